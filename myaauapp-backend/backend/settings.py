@@ -145,6 +145,50 @@ DATABASES = {
         conn_max_age=600
     )
 }
+
+# ✅ Cache Settings
+# Used to keep ready-made API responses (like a course's question bank) in memory.
+# Each server process keeps its own copy.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'myaauapp-cache',
+        'OPTIONS': {
+            'MAX_ENTRIES': 1000,
+        },
+    }
+}
+
+# Quiz attempts are saved in batches by a background thread (see quiz/buffers.py):
+# as soon as this many are waiting, or after this many seconds, whichever comes first.
+QUIZ_ATTEMPT_BUFFER_SIZE = 200
+QUIZ_ATTEMPT_FLUSH_SECONDS = 5
+# Answers sent with quiz results are counted in memory and added to QuestionStats this often
+# (or sooner, once this many different question/option pairs are waiting).
+QUIZ_ANSWER_STATS_BUFFER_SIZE = 5000
+QUIZ_ANSWER_STATS_FLUSH_SECONDS = 60
+# Results sent later by the mobile app (quizzes taken offline) are refused when their
+# taken_at is more than this many days ago.
+QUIZ_MAX_OFFLINE_DAYS = 3
+
+# Where course leaderboards are read from (see quiz/leaderboards.py). The local backend keeps
+# them in memory and loads each one again from the database after this many seconds,
+# to pick up scores saved by other server processes.
+QUIZ_LEADERBOARD_BACKEND = 'quiz.leaderboards.LocalLeaderboardBackend'
+QUIZ_LEADERBOARD_RELOAD_SECONDS = 60
+
+# Live leaderboards (see quiz/live.py): the hub that passes updates to listening clients,
+# how often at most each course's top scores are pushed, and how many are pushed.
+QUIZ_BROADCAST_HUB = 'quiz.live.LocalBroadcastHub'
+QUIZ_LIVE_PUSH_SECONDS = 2
+QUIZ_LIVE_TOP_K = 10
+
+# The job and scholarship scrapers keep the pages they download here (see quiz/scraping.py),
+# so pages that haven't changed aren't downloaded again. Set it to None to switch this off.
+# Post pages we already have are used as they are, without asking the site, for this many seconds.
+SCRAPER_CACHE_DIR = BASE_DIR / 'scraper_cache'
+SCRAPER_DETAIL_MAX_AGE = 24 * 3600
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -196,6 +240,9 @@ CORS_ALLOWED_ORIGINS = [
 #THIS IS FOR REACT NATIVE LOGIN
 CORS_ALLOW_CREDENTIALS = True
 
+# Lets the web app read these response headers (e.g. the seed of a random quiz).
+CORS_EXPOSE_HEADERS = ['ETag', 'X-Quiz-Seed']
+
 
 #THIS IS FOR REACT NATIVE LOGIN AS WELL
 # ✅ This tells Django to trust requests from your app's origin.
@@ -1,10 +1,13 @@
 from django.contrib import admin
 
 # Register your models here.
-from .models import Course, Question, JobPost, QuizScore, ScholarshipPost 
+from .models import Course, Question, QuestionStats, JobPost, QuizAttempt, QuizScore, ScholarshipPost, UserScoreSummary
 
 admin.site.register(Course)
 admin.site.register(Question)
+admin.site.register(QuestionStats)
 admin.site.register(JobPost)
 admin.site.register(QuizScore)
+admin.site.register(QuizAttempt)
+admin.site.register(UserScoreSummary)
 admin.site.register(ScholarshipPost)
\ No newline at end of file
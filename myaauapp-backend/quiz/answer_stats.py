@@ -0,0 +1,121 @@
+# quiz/answer_stats.py
+#
+# Per-question answer analytics.
+# A quiz result can come with the answers the user gave:
+#     "answers": [{"question": 12, "choice": "B", "time_ms": 5400}, ...]
+# Each answer is counted in memory (see AnswerStatsBuffer in quiz/buffers.py) and the counts
+# are added to QuestionStats every minute or so, so answers never cost a database write each.
+#
+# From the counts we work out, for every question:
+#   - difficulty: the share of answers that were right (0 = nobody gets it, 1 = everybody does).
+#   - discrimination: how strongly getting this question right goes with a high quiz score
+#     (the point-biserial correlation, from -1 to 1). Good questions are clearly above 0.
+#     A question near or below 0 is answered right just as often by weak students as by strong
+#     ones, which usually means the answer key is wrong or the question is ambiguous.
+#     The quiz score includes the question itself, which pushes short quizzes a little above 0.
+
+import math
+from collections import defaultdict
+
+from .buffers import answer_stats
+from .models import Question, QuestionStats
+from .practice import in_course
+
+
+MAX_ANSWERS = 200 # The most answers accepted with one quiz result
+CHOICES = ('A', 'B', 'C', 'D')
+
+
+def clean_answers(value):
+    """
+    Checks the "answers" sent with a quiz result.
+    Returns a list of (question_id, choice, time_ms), or raises ValueError saying what is wrong.
+    """
+    if value is None:
+        return []
+    if not isinstance(value, list) or len(value) > MAX_ANSWERS:
+        raise ValueError(f"answers must be a list of at most {MAX_ANSWERS} items.")
+
+    answers = []
+    for answer in value:
+        if not isinstance(answer, dict):
+            raise ValueError("Each answer must look like {\"question\": 12, \"choice\": \"B\", \"time_ms\": 5400}.")
+        try:
+            question_id = int(answer.get('question'))
+            time_ms = int(answer.get('time_ms') or 0)
+        except (TypeError, ValueError):
+            raise ValueError("An answer's question and time_ms must be whole numbers.")
+        choice = (answer.get('choice') or '').strip().upper()
+        if choice and choice not in CHOICES:
+            raise ValueError("An answer's choice must be A, B, C or D (or left out if it was skipped).")
+        answers.append((question_id, choice, max(time_ms, 0)))
+    return answers
+
+
+def answers_in_course(answers, question_ids):
+    # Drops answers to questions that aren't in the quiz's course (question_ids is the sorted
+    # array from question_bank.get_question_ids), so a result sent for one course can't
+    # change the statistics of another course's questions.
+    return [answer for answer in answers if in_course(question_ids, answer[0])]
+
+
+def record_answers(answers, score):
+    # Adds a quiz's answers to the in-memory counts. The quiz score is turned into 0..1 so
+    # quizzes of different lengths can be compared.
+    if not answers:
+        return
+    quiz_score = min(max(score / len(answers), 0.0), 1.0)
+    for question_id, choice, time_ms in answers:
+        answer_stats.add((question_id, choice, time_ms, quiz_score))
+
+
+def question_statistics(course_id, min_answers=1):
+    """
+    Returns difficulty and discrimination for every question in a course that has at least
+    `min_answers` answers, questions most likely to be broken first.
+    """
+    questions = dict(Question.objects.filter(course_id=course_id).values_list('pk', 'correct_answer'))
+    rows = QuestionStats.objects.filter(question_id__in=questions).values_list(
+        'question_id', 'choice', 'answers', 'total_time_ms', 'score_sum', 'score_sq_sum',
+    )
+
+    per_question = defaultdict(list)
+    for row in rows:
+        per_question[row[0]].append(row[1:])
+
+    results = []
+    for question_id, choices in per_question.items():
+        correct = questions[question_id].upper()
+        n = sum(c[1] for c in choices)
+        if n < min_answers:
+            continue
+
+        right = [c for c in choices if c[0] == correct]
+        n_right = sum(c[1] for c in right)
+        sum_right = sum(c[3] for c in right)
+        total = sum(c[3] for c in choices)
+        total_sq = sum(c[4] for c in choices)
+
+        difficulty = n_right / n
+        # Point-biserial correlation between "got it right" and the quiz score.
+        mean = total / n
+        spread = math.sqrt(max(total_sq / n - mean * mean, 0.0))
+        discrimination = None
+        if 0 < n_right < n and spread > 0:
+            mean_right = sum_right / n_right
+            mean_wrong = (total - sum_right) / (n - n_right)
+            discrimination = (mean_right - mean_wrong) / spread * math.sqrt(difficulty * (1 - difficulty))
+
+        results.append({
+            'question': question_id,
+            'correct_answer': correct,
+            'answers': n,
+            'difficulty': round(difficulty, 4),
+            'discrimination': None if discrimination is None else round(discrimination, 4),
+            'average_time_ms': round(sum(c[2] for c in choices) / n),
+            'choices': {c[0] or 'skipped': c[1] for c in sorted(choices)},
+        })
+
+    # Lowest discrimination first; questions where it can't be worked out go last.
+    results.sort(key=lambda r: (r['discrimination'] is None, r['discrimination'] or 0, r['question']))
+    return results
@@ -0,0 +1,130 @@
+# quiz/buffers.py
+#
+# Writing a row to the database for every quiz submission (or every answer) would make
+# each request wait for more INSERTs. Instead, rows are collected in memory and a
+# background thread writes them in one go: when enough have piled up, every few
+# seconds, and once more when the process shuts down.
+# Each server process has its own buffers, so a crash can lose at most one flush's worth.
+
+import atexit
+import threading
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+from .models import Question, QuestionStats, QuizAttempt
+
+
+class BufferedWriter:
+    """
+    Collects items in memory and hands them to write() in batches from a background thread.
+    Subclasses decide what an item is and how a batch is written. By default a batch is a
+    list; new_batch() and add_to_batch() can be overridden to e.g. add counts together instead.
+    """
+
+    def __init__(self, max_size, max_age):
+        self.max_size = max_size # write as soon as this many items are waiting
+        self.max_age = max_age   # ... or after this many seconds, whichever comes first
+        self._items = self.new_batch()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        atexit.register(self.flush)
+
+    def add(self, item):
+        with self._lock:
+            self.add_to_batch(self._items, item)
+            full = len(self._items) >= self.max_size
+            # The thread is started on first use, so each forked worker process gets its own.
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=type(self).__name__, daemon=True)
+                self._thread.start()
+        if full:
+            self._wake.set()
+
+    def take(self):
+        # Takes everything that is waiting, leaving the buffer empty.
+        with self._lock:
+            items, self._items = self._items, self.new_batch()
+        return items
+
+    def flush(self):
+        items = self.take()
+        if not items:
+            return
+        try:
+            self.write(items)
+        except Exception as e:
+            print(f"[ERROR] {type(self).__name__} could not write {len(items)} item(s): {e}")
+
+    def new_batch(self):
+        return []
+
+    def add_to_batch(self, batch, item):
+        batch.append(item)
+
+    def write(self, items):
+        raise NotImplementedError
+
+    def _run(self):
+        while True:
+            self._wake.wait(timeout=self.max_age)
+            self._wake.clear()
+            # Background threads have to look after their own database connection.
+            close_old_connections()
+            self.flush()
+
+
+class AttemptBuffer(BufferedWriter):
+    # Items are unsaved QuizAttempt objects.
+    def write(self, items):
+        QuizAttempt.objects.bulk_create(items, batch_size=500)
+
+
+class AnswerStatsBuffer(BufferedWriter):
+    # Items are (question_id, choice, time_ms, quiz_score) for one answer, where quiz_score
+    # is the whole quiz's score from 0 to 1. They are added up in memory per (question, choice),
+    # so a batch is one row per option that was picked, however many answers came in.
+
+    def new_batch(self):
+        return {}
+
+    def add_to_batch(self, batch, item):
+        question_id, choice, time_ms, quiz_score = item
+        counts = batch.setdefault((question_id, choice), [0, 0, 0.0, 0.0])
+        counts[0] += 1
+        counts[1] += time_ms
+        counts[2] += quiz_score
+        counts[3] += quiz_score * quiz_score
+
+    def write(self, items):
+        # Answers to questions that don't exist (anymore) are dropped.
+        known = set(Question.objects.filter(pk__in={question_id for question_id, _ in items}).values_list('pk', flat=True))
+        rows = [(question_id, choice, *counts) for (question_id, choice), counts in items.items() if question_id in known]
+
+        # The counts are added to what is already stored, so every process can flush its own.
+        table = connection.ops.quote_name(QuestionStats._meta.db_table)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.executemany(
+                f"""
+                INSERT INTO {table} (question_id, choice, answers, total_time_ms, score_sum, score_sq_sum)
+                VALUES (%s, %s, %s, %s, %s, %s)
+                ON CONFLICT (question_id, choice) DO UPDATE SET
+                    answers = {table}.answers + excluded.answers,
+                    total_time_ms = {table}.total_time_ms + excluded.total_time_ms,
+                    score_sum = {table}.score_sum + excluded.score_sum,
+                    score_sq_sum = {table}.score_sq_sum + excluded.score_sq_sum
+                """,
+                rows,
+            )
+
+
+attempt_log = AttemptBuffer(
+    max_size=getattr(settings, 'QUIZ_ATTEMPT_BUFFER_SIZE', 200),
+    max_age=getattr(settings, 'QUIZ_ATTEMPT_FLUSH_SECONDS', 5),
+)
+
+answer_stats = AnswerStatsBuffer(
+    max_size=getattr(settings, 'QUIZ_ANSWER_STATS_BUFFER_SIZE', 5000),
+    max_age=getattr(settings, 'QUIZ_ANSWER_STATS_FLUSH_SECONDS', 60),
+)
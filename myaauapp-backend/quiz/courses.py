@@ -0,0 +1,42 @@
+# quiz/courses.py
+#
+# Every quiz endpoint starts by turning a course code from the URL (e.g. "gst101")
+# into a course. Course codes almost never change, so each server process keeps a
+# small code -> id dictionary and the hot endpoints can skip that query completely.
+# The dictionary is emptied whenever a Course is saved or deleted in this process,
+# and each entry is only trusted for a few minutes in case another process changed it.
+
+import time
+
+from django.http import Http404
+
+from .models import Course
+from .text import normalize_course_code
+
+
+COURSE_ID_TTL = 300  # seconds
+
+# normalized course code -> (course id, time it was looked up)
+_course_ids = {}
+
+
+def get_course_id(course_code):
+    """
+    Returns the id of the course with this code, or raises Http404 (like get_object_or_404).
+    """
+    code = normalize_course_code(course_code)
+    entry = _course_ids.get(code)
+    if entry is not None and time.monotonic() - entry[1] < COURSE_ID_TTL:
+        return entry[0]
+
+    course_id = Course.objects.filter(code=code).values_list('pk', flat=True).first()
+    if course_id is None:
+        # We don't remember misses, so a course that is added later is found straight away.
+        raise Http404(f'No course with code {code}.')
+
+    _course_ids[code] = (course_id, time.monotonic())
+    return course_id
+
+
+def forget_course_ids():
+    _course_ids.clear()
@@ -0,0 +1,311 @@
+# quiz/leaderboards.py
+#
+# Ranking rules for the course leaderboards, and the backends that serve them.
+# Higher scores come first. When two people have the same score, whoever got it
+# first is ahead (and if even that is a tie, the user with the smaller id).
+# The overall leaderboard works the same way on each user's UserScoreSummary,
+# ranked by their total or their average over all courses.
+#
+# All-time course leaderboards are read through a backend chosen by the QUIZ_LEADERBOARD_BACKEND setting:
+#   - LocalLeaderboardBackend (the default) keeps each course's leaderboard as a sorted
+#     list in this process's memory, so reading it doesn't touch the database.
+#   - DatabaseLeaderboardBackend asks the database every time.
+# QuizScore in the database is always the source of truth. Something like a Redis sorted
+# set could be added later as another LeaderboardBackend subclass.
+# Weekly and monthly leaderboards are read from PeriodScore by PeriodLeaderboardBackend.
+
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import namedtuple
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import PeriodScore, QuizScore, ScoreBucket, UserScoreSummary
+
+
+LEADERBOARD_ORDER = ['-highest_score', 'achieved_at', 'user_id']
+
+# One row of a course leaderboard. `id` is the QuizScore id and `user` the username.
+LeaderboardEntry = namedtuple('LeaderboardEntry', ['rank', 'id', 'user_id', 'user', 'highest_score', 'achieved_at'])
+
+# ?by= on the overall leaderboard -> the UserScoreSummary field it ranks by.
+OVERALL_RANKINGS = {
+    'total': 'total_score',
+    'average': 'average_score',
+}
+
+
+def ranked_scores(course_id):
+    # All the scores for a course in leaderboard order, with users and course loaded in the same query.
+    return (
+        QuizScore.objects
+        .filter(course_id=course_id)
+        .select_related('user', 'course')
+        .order_by(*LEADERBOARD_ORDER)
+    )
+
+
+def rank_of(quiz_score):
+    """
+    Returns the 1-based leaderboard position of a QuizScore.
+    This is one COUNT of the rows ahead of it, which the (course, -highest_score, achieved_at)
+    index answers without reading the whole leaderboard.
+    """
+    ahead = QuizScore.objects.filter(course_id=quiz_score.course_id).filter(
+        Q(highest_score__gt=quiz_score.highest_score)
+        | Q(highest_score=quiz_score.highest_score, achieved_at__lt=quiz_score.achieved_at)
+        | Q(highest_score=quiz_score.highest_score, achieved_at=quiz_score.achieved_at, user_id__lt=quiz_score.user_id)
+    )
+    return ahead.count() + 1
+
+
+def ranked_summaries(by='total'):
+    # Every user's summary in overall leaderboard order, with users loaded in the same query.
+    field = OVERALL_RANKINGS[by]
+    return UserScoreSummary.objects.select_related('user').order_by(f'-{field}', 'achieved_at', 'pk')
+
+
+def summary_rank_of(summary, by='total'):
+    """
+    Returns the 1-based overall leaderboard position of a UserScoreSummary,
+    with one COUNT that the summary's index on the ranked field answers.
+    """
+    field = OVERALL_RANKINGS[by]
+    value = getattr(summary, field)
+    ahead = UserScoreSummary.objects.filter(
+        Q(**{f'{field}__gt': value})
+        | Q(**{field: value, 'achieved_at__lt': summary.achieved_at})
+        | Q(**{field: value, 'achieved_at': summary.achieved_at, 'pk__lt': summary.pk})
+    )
+    return ahead.count() + 1
+
+
+def score_percentile(course_id, score):
+    """
+    Where `score` falls among everyone's best scores in a course, from the course's
+    score histogram (one small query, then a sum over the buckets).
+    Returns (scorers, below, equal): how many users have a score, how many are below, and how many tie.
+    """
+    scorers = below = equal = 0
+    for bucket_score, count in ScoreBucket.objects.filter(course_id=course_id, count__gt=0).values_list('score', 'count'):
+        scorers += count
+        if bucket_score < score:
+            below += count
+        elif bucket_score == score:
+            equal += count
+    return scorers, below, equal
+
+
+def _entries(scores, first_rank):
+    # QuizScore or PeriodScore rows -> LeaderboardEntry, ranked from first_rank.
+    rows = scores.values_list('pk', 'user_id', 'user__username', 'highest_score', 'achieved_at')
+    return [LeaderboardEntry(first_rank + offset, *row) for offset, row in enumerate(rows)]
+
+
+class LeaderboardBackend:
+    """
+    What every course leaderboard backend can do. Ranks start at 1.
+    """
+
+    def count(self, course_id):
+        # How many people are on the course's leaderboard.
+        raise NotImplementedError
+
+    def top(self, course_id, offset, limit):
+        # A list of up to `limit` LeaderboardEntry, starting after the first `offset`.
+        raise NotImplementedError
+
+    def entry_for(self, course_id, user_id):
+        # The user's LeaderboardEntry, or None if they have no score in the course.
+        raise NotImplementedError
+
+    def around(self, course_id, user_id, radius):
+        # The user's entry with up to `radius` entries above and below it ([] if they have no score).
+        entry = self.entry_for(course_id, user_id)
+        if entry is None:
+            return []
+        first = max(entry.rank - 1 - radius, 0)
+        return self.top(course_id, first, entry.rank - first + radius)
+
+    def record(self, course_id, score_id, user_id, username, highest_score, achieved_at):
+        # Called after a user's best score was saved in the database.
+        pass
+
+    def forget(self, course_id=None):
+        # Called when scores were changed some other way; the next read starts from the database again.
+        pass
+
+
+class DatabaseLeaderboardBackend(LeaderboardBackend):
+    # Every question goes to the database, using the (course, -highest_score, achieved_at) index.
+
+    def count(self, course_id):
+        return QuizScore.objects.filter(course_id=course_id).count()
+
+    def top(self, course_id, offset, limit):
+        return _entries(ranked_scores(course_id)[offset:offset + limit], offset + 1)
+
+    def entry_for(self, course_id, user_id):
+        quiz_score = QuizScore.objects.select_related('user').filter(course_id=course_id, user_id=user_id).first()
+        if quiz_score is None:
+            return None
+        return LeaderboardEntry(
+            rank_of(quiz_score), quiz_score.pk, quiz_score.user_id, quiz_score.user.username,
+            quiz_score.highest_score, quiz_score.achieved_at,
+        )
+
+
+class PeriodLeaderboardBackend(LeaderboardBackend):
+    """
+    The leaderboard of the current week or month, read from PeriodScore. Each period
+    has its own rows, so a new one starts empty on Monday (or the 1st) by itself,
+    and the index only ever reads the period being shown.
+    """
+
+    def __init__(self, period, when=None):
+        self.period = period
+        self.period_start = PeriodScore.start_of(period, when or timezone.now())
+
+    def _scores(self, course_id):
+        return PeriodScore.objects.filter(course_id=course_id, period=self.period, period_start=self.period_start)
+
+    def count(self, course_id):
+        return self._scores(course_id).count()
+
+    def top(self, course_id, offset, limit):
+        return _entries(self._scores(course_id).order_by(*LEADERBOARD_ORDER)[offset:offset + limit], offset + 1)
+
+    def entry_for(self, course_id, user_id):
+        score = self._scores(course_id).select_related('user').filter(user_id=user_id).first()
+        if score is None:
+            return None
+        ahead = self._scores(course_id).filter(
+            Q(highest_score__gt=score.highest_score)
+            | Q(highest_score=score.highest_score, achieved_at__lt=score.achieved_at)
+            | Q(highest_score=score.highest_score, achieved_at=score.achieved_at, user_id__lt=score.user_id)
+        )
+        return LeaderboardEntry(
+            ahead.count() + 1, score.pk, score.user_id, score.user.username, score.highest_score, score.achieved_at,
+        )
+
+
+class _CourseBoard:
+    # One course's leaderboard: `keys` stays sorted in leaderboard order, so a user's
+    # rank is a binary search (bisect) and the top K is a slice.
+    def __init__(self, rows):
+        self.keys = []
+        self.users = {} # user id -> (key, QuizScore id, username)
+        for score_id, user_id, username, highest_score, achieved_at in rows:
+            key = (-highest_score, achieved_at, user_id)
+            self.keys.append(key)
+            self.users[user_id] = (key, score_id, username)
+        self.keys.sort()
+        self.loaded_at = time.monotonic()
+
+    def entry_at(self, index):
+        key = self.keys[index]
+        user_id = key[2]
+        _, score_id, username = self.users[user_id]
+        return LeaderboardEntry(index + 1, score_id, user_id, username, -key[0], key[1])
+
+    def index_of(self, user_id):
+        # Binary search for the user's place in the sorted keys.
+        return bisect_left(self.keys, self.users[user_id][0])
+
+    def put(self, score_id, user_id, username, highest_score, achieved_at):
+        if user_id in self.users:
+            del self.keys[self.index_of(user_id)]
+        key = (-highest_score, achieved_at, user_id)
+        insort(self.keys, key)
+        self.users[user_id] = (key, score_id, username)
+
+
+class LocalLeaderboardBackend(LeaderboardBackend):
+    """
+    Keeps each course's leaderboard in memory, loaded from QuizScore the first time
+    it is asked for. Rank and neighbour lookups are a binary search, and top-K is a slice.
+
+    Every server process has its own copy and only sees its own submissions straight away,
+    so each copy is loaded again from the database after QUIZ_LEADERBOARD_RELOAD_SECONDS
+    to pick up the scores other processes saved.
+    """
+
+    def __init__(self):
+        self.reload_seconds = getattr(settings, 'QUIZ_LEADERBOARD_RELOAD_SECONDS', 60)
+        self._boards = {} # course id -> _CourseBoard
+        # One lock for everything. Loading happens while holding it too, so a score recorded
+        # while a course is loading can't be lost by the load finishing afterwards.
+        self._lock = threading.RLock()
+
+    def _board(self, course_id):
+        board = self._boards.get(course_id)
+        if board is None or time.monotonic() - board.loaded_at > self.reload_seconds:
+            rows = (
+                QuizScore.objects.filter(course_id=course_id)
+                .values_list('pk', 'user_id', 'user__username', 'highest_score', 'achieved_at')
+            )
+            board = self._boards[course_id] = _CourseBoard(rows)
+        return board
+
+    def count(self, course_id):
+        with self._lock:
+            return len(self._board(course_id).keys)
+
+    def top(self, course_id, offset, limit):
+        with self._lock:
+            board = self._board(course_id)
+            return [board.entry_at(index) for index in range(offset, min(offset + limit, len(board.keys)))]
+
+    def entry_for(self, course_id, user_id):
+        with self._lock:
+            board = self._board(course_id)
+            if user_id not in board.users:
+                return None
+            return board.entry_at(board.index_of(user_id))
+
+    def record(self, course_id, score_id, user_id, username, highest_score, achieved_at):
+        with self._lock:
+            board = self._boards.get(course_id)
+            # A course nobody has looked at yet is loaded (with this score in it) when it is first read.
+            if board is not None:
+                board.put(score_id, user_id, username, highest_score, achieved_at)
+
+    def forget(self, course_id=None):
+        with self._lock:
+            if course_id is None:
+                self._boards.clear()
+            else:
+                self._boards.pop(course_id, None)
+
+
+class RankedEntries:
+    """
+    Lets DRF's paginator page through a backend's leaderboard like a list:
+    it asks for len() and a slice, and only that slice is read.
+    """
+
+    def __init__(self, backend, course_id):
+        self.backend = backend
+        self.course_id = course_id
+
+    def __len__(self):
+        return self.backend.count(self.course_id)
+
+    def __getitem__(self, index):
+        return self.backend.top(self.course_id, index.start or 0, index.stop - (index.start or 0))
+
+
+_backend = None
+
+
+def get_leaderboard_backend():
+    # The backend named by settings.QUIZ_LEADERBOARD_BACKEND, created once per process.
+    global _backend
+    if _backend is None:
+        path = getattr(settings, 'QUIZ_LEADERBOARD_BACKEND', 'quiz.leaderboards.LocalLeaderboardBackend')
+        _backend = import_string(path)()
+    return _backend
@@ -0,0 +1,182 @@
+# quiz/live.py
+#
+# Live leaderboards: instead of polling LeaderboardView, a client can keep one connection open
+# (GET /api/quiz/leaderboard/<course_code>/live/, a Server-Sent Events stream) and be sent the
+# course's top scores whenever they change. This needs the site to run under ASGI (backend/asgi.py);
+# under WSGI the view sends the leaderboard once and tells the browser to ask again in a while.
+#
+# Two parts:
+#   - A BroadcastHub passes messages to everyone listening on a channel. LocalBroadcastHub does
+#     that inside this process; a pub/sub service (e.g. Redis) could be used instead by writing
+#     another subclass and pointing the QUIZ_BROADCAST_HUB setting at it.
+#   - LeaderboardPusher collects "this course's leaderboard changed" calls and builds and publishes
+#     the top scores at most once every QUIZ_LIVE_PUSH_SECONDS per course, however many scores
+#     come in meanwhile and however many clients are listening.
+
+import asyncio
+import json
+import threading
+
+from django.conf import settings
+from django.db import connection
+from django.utils.module_loading import import_string
+
+from .leaderboards import get_leaderboard_backend
+from .models import Course
+
+
+def leaderboard_channel(course_id):
+    return f'leaderboard:{course_id}'
+
+
+class BroadcastHub:
+    """
+    What every hub can do. Messages are strings.
+    """
+
+    def publish(self, channel, message):
+        # Sends the message to everyone listening on the channel. Can be called from any thread.
+        raise NotImplementedError
+
+    def has_listeners(self, channel):
+        # Lets publishers skip building messages nobody will get. Hubs that can't tell say True.
+        return True
+
+    def subscribe(self, channel, timeout=None):
+        # Starts listening on the channel straight away and returns a subscription: iterate over it
+        # with `async for` to get the messages, and close() it when done. It yields None after
+        # `timeout` seconds without a message, so the caller can send a keep-alive.
+        raise NotImplementedError
+
+
+class LocalBroadcastHub(BroadcastHub):
+    # Every listener has a small queue on its own event loop. If a slow client falls behind,
+    # the oldest message is dropped: only the newest leaderboard matters.
+    queue_size = 2
+
+    def __init__(self):
+        self._listeners = {} # channel -> set of (event loop, asyncio.Queue)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            listeners = list(self._listeners.get(channel, ()))
+        for loop, queue in listeners:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, message)
+            except RuntimeError:
+                pass # That listener's event loop has already closed.
+
+    @staticmethod
+    def _offer(queue, message):
+        if queue.full():
+            queue.get_nowait()
+        queue.put_nowait(message)
+
+    def has_listeners(self, channel):
+        with self._lock:
+            return bool(self._listeners.get(channel))
+
+    def subscribe(self, channel, timeout=None):
+        return _LocalSubscription(self, channel, timeout)
+
+    def _add(self, channel, listener):
+        with self._lock:
+            self._listeners.setdefault(channel, set()).add(listener)
+
+    def _remove(self, channel, listener):
+        with self._lock:
+            listeners = self._listeners.get(channel, set())
+            listeners.discard(listener)
+            if not listeners:
+                self._listeners.pop(channel, None)
+
+
+class _LocalSubscription:
+    # One listener of a LocalBroadcastHub channel. Must be created inside the listener's event loop.
+    def __init__(self, hub, channel, timeout):
+        self.hub = hub
+        self.channel = channel
+        self.timeout = timeout
+        self.queue = asyncio.Queue(maxsize=hub.queue_size)
+        self.listener = (asyncio.get_running_loop(), self.queue)
+        hub._add(channel, self.listener)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await asyncio.wait_for(self.queue.get(), self.timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.hub._remove(self.channel, self.listener)
+
+
+def leaderboard_snapshot(course_id):
+    # The course's current top scores as a JSON string, ready to send.
+    from .serializers import LeaderboardEntrySerializer
+
+    top_k = getattr(settings, 'QUIZ_LIVE_TOP_K', 10)
+    entries = get_leaderboard_backend().top(course_id, 0, top_k)
+    course_code = Course.objects.filter(pk=course_id).values_list('code', flat=True).first()
+    data = LeaderboardEntrySerializer(entries, many=True, context={'course_code': course_code}).data
+    return json.dumps({'course_code': course_code, 'results': data}, separators=(',', ':'), default=str)
+
+
+class LeaderboardPusher:
+    # The first change to a course starts a timer; changes that arrive before it fires are
+    # covered by the same push. The snapshot is built once and sent to every listener.
+
+    def __init__(self, hub, interval):
+        self.hub = hub
+        self.interval = interval
+        self._waiting = set() # course ids with a push already scheduled
+        self._last = {}       # course id -> last snapshot sent, so unchanged top scores aren't sent again
+        self._lock = threading.Lock()
+
+    def changed(self, course_id):
+        if not self.hub.has_listeners(leaderboard_channel(course_id)):
+            return
+        with self._lock:
+            if course_id in self._waiting:
+                return
+            self._waiting.add(course_id)
+        timer = threading.Timer(self.interval, self._push, args=[course_id])
+        timer.daemon = True
+        timer.start()
+
+    def _push(self, course_id):
+        with self._lock:
+            self._waiting.discard(course_id)
+        try:
+            snapshot = leaderboard_snapshot(course_id)
+            if self._last.get(course_id) != snapshot:
+                self._last[course_id] = snapshot
+                self.hub.publish(leaderboard_channel(course_id), snapshot)
+        except Exception as e:
+            print(f"[ERROR] Could not push the leaderboard of course {course_id}: {e}")
+        finally:
+            # Timer threads don't get their database connection cleaned up for them.
+            connection.close()
+
+
+_hub = None
+_pusher = None
+
+
+def get_broadcast_hub():
+    # The hub named by settings.QUIZ_BROADCAST_HUB, created once per process.
+    global _hub
+    if _hub is None:
+        _hub = import_string(getattr(settings, 'QUIZ_BROADCAST_HUB', 'quiz.live.LocalBroadcastHub'))()
+    return _hub
+
+
+def get_leaderboard_pusher():
+    global _pusher
+    if _pusher is None:
+        _pusher = LeaderboardPusher(get_broadcast_hub(), getattr(settings, 'QUIZ_LIVE_PUSH_SECONDS', 2))
+    return _pusher
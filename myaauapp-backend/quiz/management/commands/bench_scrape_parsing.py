@@ -0,0 +1,122 @@
+import json
+import os
+import time
+import tracemalloc
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from quiz.scraping import read_detail, read_listing
+from quiz.sources import get_sources
+
+
+class Command(BaseCommand):
+    help = ('Compares how fast saved pages are read the old way (whole page, html.parser) and the '
+            'new way (lxml, only the parts each source needs). Uses the pages in SCRAPER_CACHE_DIR '
+            'unless --page / --detail are given.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--page', action='append', default=[], metavar='SOURCE=PATH',
+                            help="A saved listing page of a source, e.g. --page JobsRegion=jobs.html")
+        parser.add_argument('--detail', action='append', default=[], metavar='SOURCE=PATH',
+                            help="A saved post page of a source with detail fields.")
+        parser.add_argument('--cache-dir', default=getattr(settings, 'SCRAPER_CACHE_DIR', None),
+                            help="Where to look for pages when none are given (default: SCRAPER_CACHE_DIR).")
+        parser.add_argument('--repeat', type=int, default=20, help="How many times each page is read (default 20).")
+        parser.add_argument('--max-details', type=int, default=10,
+                            help="At most this many cached post pages per source (default 10).")
+
+    def handle(self, *args, **options):
+        # 1. Find the pages to read
+        pages = [self.saved_page(spec, 'listing') for spec in options['page']]
+        pages += [self.saved_page(spec, 'detail') for spec in options['detail']]
+        if not pages and options['cache_dir']:
+            pages = self.cached_pages(options['cache_dir'], options['max_details'])
+        if not pages:
+            raise CommandError("No saved pages found. Run scrape_jobs first (it fills SCRAPER_CACHE_DIR) "
+                               "or pass --page SOURCE=PATH.")
+
+        # 2. Read each page both ways
+        repeat = max(options['repeat'], 1)
+        self.stdout.write(f"{'page':<40} {'KB':>6} {'old ms':>8} {'new ms':>8} {'faster':>7} "
+                          f"{'old peak KB':>12} {'new peak KB':>12}  same")
+        old_total = new_total = 0.0
+        different = 0
+        for label, source, kind, content in pages:
+            old_result, old_ms, old_peak = self.measure(source, kind, content, False, repeat)
+            new_result, new_ms, new_peak = self.measure(source, kind, content, True, repeat)
+            old_total += old_ms
+            new_total += new_ms
+            same = old_result == new_result
+            different += not same
+            self.stdout.write(f"{label[:40]:<40} {len(content) / 1024:>6.0f} {old_ms:>8.2f} {new_ms:>8.2f} "
+                              f"{old_ms / new_ms if new_ms else 0:>6.1f}x {old_peak / 1024:>12.0f} "
+                              f"{new_peak / 1024:>12.0f}  {'yes' if same else 'NO'}")
+
+        # 3. Totals
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(pages)} pages: {old_total:.1f} ms the old way, {new_total:.1f} ms the new way "
+            f"({old_total / new_total if new_total else 0:.1f}x faster)."
+        ))
+        if different:
+            self.stdout.write(self.style.ERROR(f"{different} page(s) gave different results. Check their selectors."))
+
+    def measure(self, source, kind, content, fast, repeat):
+        # Returns (what was read, average ms per read, peak memory of one read in bytes).
+        def read():
+            if kind == 'listing':
+                return read_listing(source, content, fast=fast)
+            return read_detail(source, content, source.new_post(), fast=fast)
+
+        started = time.perf_counter()
+        for _ in range(repeat):
+            result = read()
+        ms = (time.perf_counter() - started) * 1000 / repeat
+
+        tracemalloc.start()
+        read()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return result, ms, peak
+
+    def saved_page(self, spec, kind):
+        name, _, path = spec.partition('=')
+        if not path:
+            raise CommandError(f"Expected SOURCE=PATH, got {spec!r}.")
+        try:
+            source = get_sources([name])[0]
+            with open(path, 'rb') as f:
+                content = f.read()
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+        if kind == 'detail' and not source.detail_fields:
+            raise CommandError(f"{source.name} doesn't read post pages.")
+        return f"{source.name} {kind} {os.path.basename(path)}", source, kind, content
+
+    def cached_pages(self, directory, max_details):
+        # Works out which source each cached page belongs to from its URL: a source's listing URL,
+        # or another page on the same site for sources that read post pages.
+        if not os.path.isdir(directory):
+            return []
+        sources = get_sources()
+        pages, details = [], {}
+        for entry in sorted(os.scandir(directory), key=lambda e: e.name):
+            if not entry.name.endswith('.json'):
+                continue
+            try:
+                with open(entry.path, 'rb') as f:
+                    url = json.load(f)['url']
+                with open(entry.path[:-len('.json')] + '.body', 'rb') as f:
+                    content = f.read()
+            except (OSError, ValueError, KeyError):
+                continue
+            for source in sources:
+                if url == source.url:
+                    pages.append((f"{source.name} listing", source, 'listing', content))
+                    break
+                if source.detail_fields and urlsplit(url).netloc == urlsplit(source.url).netloc:
+                    if details.get(source.name, 0) < max_details:
+                        details[source.name] = details.get(source.name, 0) + 1
+                        pages.append((f"{source.name} detail {urlsplit(url).path}", source, 'detail', content))
+                    break
+        return sorted(pages, key=lambda page: page[0])
@@ -1,60 +1,129 @@
 # Import the tools we need
+from collections import Counter, defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
 from django.core.management.base import BaseCommand
-from quiz.models import Question
-import unicodedata
+from django.db import transaction
+from quiz.models import Question, bump_question_bank_version
+from quiz.text import clean_text
+
+
+# This is a list of all the fields we need to check.
+FIELDS_TO_CHECK = ['question_text', 'option_a', 'option_b', 'option_c', 'option_d']
+
+
+def clean_chunk(rows):
+    """
+    Cleans a chunk of (pk, course_id, correct_answer, *FIELDS_TO_CHECK) rows.
+    Runs inside a worker process, so it only gets and returns plain values.
+    Returns (changes, invalid) where changes is a list of (pk, course_id, {field: new_text})
+    and invalid is a list of (pk, correct_answer) for rows with a bad answer key.
+    """
+    changes = []
+    invalid = []
+
+    for pk, course_id, correct_answer, *texts in rows:
+        # Special check for the correct_answer field. We don't save these rows to avoid the error.
+        if len(correct_answer) != 1 or correct_answer.upper() not in ['A', 'B', 'C', 'D']:
+            invalid.append((pk, correct_answer))
+            continue
+
+        changed = {}
+        for field, original_text in zip(FIELDS_TO_CHECK, texts):
+            # Check if the text is empty or None before trying to clean it
+            if not original_text:
+                continue
+
+            # This is the new, more powerful cleaning step (see quiz/text.py).
+            new_text = clean_text(original_text)
+            if new_text != original_text:
+                changed[field] = new_text
+
+        if changed:
+            changes.append((pk, course_id, changed))
+
+    return changes, invalid
+
 
 class Command(BaseCommand):
     help = 'Cleans up non-standard characters in the quiz database.'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would change, do not save anything.')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='How many questions to read and clean at a time.')
+        parser.add_argument('--workers', type=int, default=4, help='How many processes clean text at the same time (1 = no extra processes).')
+
     def handle(self, *args, **options):
-        questions = Question.objects.all()
+        dry_run = options['dry_run']
+        chunk_size = options['chunk_size']
+        workers = options['workers']
+
+        field_counts = Counter()
         count = 0
-        
-        # We go through each question one by one.
-        for question in questions:
-            is_dirty = False
-            
-            # This is a list of all the fields we need to check.
-            fields_to_check = [
-                'question_text', 'option_a', 'option_b', 'option_c', 'option_d'
-            ]
-
-            # We loop through each field.
-            for field in fields_to_check:
-                original_text = getattr(question, field)
-                
-                # Check if the text is empty or None before trying to clean it
-                if not original_text:
-                    continue
-                
-                # This is the new, more powerful cleaning step.
-                # We normalize the text to remove all non-standard characters.
-                new_text = unicodedata.normalize('NFKD', original_text).encode('ascii', 'ignore').decode('utf-8')
-                
-                # We also need to get rid of any stray hyphens or newlines that might be left.
-                new_text = new_text.replace('\n', ' ').replace('\r', '').replace('\t', '')
-                
-                # We also clean up any double spaces or hyphens that might have been created.
-                new_text = new_text.replace('--', '-').replace('  ', ' ')
-                
-                # If the text has changed, we mark it as dirty.
-                if new_text != original_text:
-                    is_dirty = True
-                
-                # We save the cleaned text back to the question field.
-                setattr(question, field, new_text)
-
-            # Special check for the correct_answer field
-            correct_answer = getattr(question, 'correct_answer')
-            if len(correct_answer) != 1 or correct_answer.upper() not in ['A', 'B', 'C', 'D']:
-                self.stdout.write(self.style.ERROR(f'Invalid correct_answer for question ID {question.pk}: {correct_answer}'))
+
+        # We stream the questions from the database a chunk at a time instead of loading them all.
+        rows = (
+            Question.objects.order_by('pk')
+            .values_list('pk', 'course_id', 'correct_answer', *FIELDS_TO_CHECK)
+            .iterator(chunk_size=chunk_size)
+        )
+        chunks = iter(lambda: list(islice(rows, chunk_size)), [])
+
+        for changes, invalid in self.clean_chunks(chunks, workers):
+            for pk, correct_answer in invalid:
+                self.stdout.write(self.style.ERROR(f'Invalid correct_answer for question ID {pk}: {correct_answer}'))
                 self.stdout.write(self.style.NOTICE(f'You must manually fix this in your Django Admin or database.'))
-                is_dirty = False  # Do not save to avoid the error
-            
-            # If we changed anything, we save it in the database.
-            if is_dirty:
-                question.save()
-                count += 1
-                self.stdout.write(self.style.SUCCESS(f'Fixed question with ID: {question.pk}'))
-        
-        self.stdout.write(self.style.SUCCESS(f'Successfully cleaned {count} questions!'))
\ No newline at end of file
+
+            for pk, course_id, changed in changes:
+                field_counts.update(changed.keys())
+                if options['verbosity'] > 1:
+                    self.stdout.write(f'Question {pk}: {", ".join(sorted(changed))}')
+
+            if not dry_run:
+                self.save_changes(changes)
+            count += len(changes)
+
+        for field in FIELDS_TO_CHECK:
+            self.stdout.write(f'  {field}: {field_counts[field]} changed')
+        if dry_run:
+            self.stdout.write(self.style.WARNING(f'Dry run: {count} questions would be cleaned, nothing was saved.'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'Successfully cleaned {count} questions!'))
+
+    def clean_chunks(self, chunks, workers):
+        # Yields the result of clean_chunk for every chunk, in order.
+        if workers <= 1:
+            for chunk in chunks:
+                yield clean_chunk(chunk)
+            return
+
+        # Only a few chunks are handed to the pool at a time, so memory stays flat
+        # however many questions there are.
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            pending = []
+            for chunk in chunks:
+                pending.append(pool.submit(clean_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    yield pending.pop(0).result()
+            for future in pending:
+                yield future.result()
+
+    def save_changes(self, changes):
+        if not changes:
+            return
+
+        with transaction.atomic():
+            # Every course we touch gets a new question bank version, so caches and offline packs pick up the change.
+            # Cleaning never changes a question's content_hash (see quiz/text.py), so that stays as it is.
+            revisions = {course_id: bump_question_bank_version(course_id) for course_id in {c[1] for c in changes}}
+
+            # Questions are grouped by which fields changed, so each UPDATE only writes those fields.
+            groups = defaultdict(list)
+            for pk, course_id, changed in changes:
+                groups[tuple(sorted(changed))].append(
+                    Question(pk=pk, revision=revisions[course_id], **changed)
+                )
+
+            for fields, questions in groups.items():
+                Question.objects.bulk_update(questions, [*fields, 'revision'], batch_size=500)
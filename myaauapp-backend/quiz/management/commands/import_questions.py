@@ -0,0 +1,186 @@
+# Import the tools we need
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+
+from quiz.models import Course, Question, bump_question_bank_version
+from quiz.text import normalize_course_code
+
+
+# The columns every question CSV must have.
+CSV_COLUMNS = ['question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
+# What gets overwritten when a row matches a question that is already in the course.
+UPDATE_FIELDS = ['question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer', 'revision']
+OPTION_MAX_LENGTH = Question._meta.get_field('option_a').max_length
+
+
+class Command(BaseCommand):
+    help = 'Imports quiz questions from one or more CSV files, e.g. import_questions gst101_questions.csv --course GST101'
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_files', nargs='+', help='CSV files with the columns: ' + ', '.join(CSV_COLUMNS))
+        parser.add_argument(
+            '--course',
+            help='Course code to add the questions to. If left out, it is taken from each '
+                 'file name, e.g. gst101_questions.csv goes to GST101.',
+        )
+        parser.add_argument('--batch-size', type=int, default=500, help='How many rows to insert per query.')
+        parser.add_argument('--workers', type=int, default=4, help='How many files to import at the same time.')
+
+    def handle(self, *args, **options):
+        jobs = []
+        for csv_file in options['csv_files']:
+            path = Path(csv_file)
+            if not path.is_file():
+                raise CommandError(f'File not found: {csv_file}')
+            course_code = options['course'] or path.stem.split('_')[0]
+            jobs.append((path, normalize_course_code(course_code)))
+
+        workers = max(1, min(options['workers'], len(jobs)))
+        if connection.vendor == 'sqlite' and workers > 1:
+            # SQLite only lets one connection write at a time, so parallel imports would just wait on each other.
+            self.stdout.write(self.style.NOTICE('SQLite can only write one file at a time, importing files one by one.'))
+            workers = 1
+
+        started = time.perf_counter()
+        total = 0
+
+        # Each file is imported by its own worker thread (with its own database connection).
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(self.import_file_in_thread, path, code, options['batch_size']) for path, code in jobs]
+            for future in as_completed(futures):
+                path, course_code, counts, seconds, errors = future.result()
+                for error in errors:
+                    self.stdout.write(self.style.ERROR(f'{path.name}: {error}'))
+                rows = sum(counts.values())
+                total += rows
+                self.stdout.write(self.style.SUCCESS(
+                    f'✅ {path.name} -> {course_code}: {counts["added"]} added, {counts["updated"]} updated, '
+                    f'{counts["skipped"]} already there, in {seconds:.2f}s ({rows / max(seconds, 1e-6):.0f} rows/s)'
+                ))
+
+        seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Processed {total} questions from {len(jobs)} file(s) in {seconds:.2f}s '
+            f'({total / max(seconds, 1e-6):.0f} rows/s)'
+        ))
+
+    def import_file_in_thread(self, path, course_code, batch_size):
+        try:
+            return self.import_file(path, course_code, batch_size)
+        finally:
+            # Threads don't get their database connection cleaned up for them.
+            connection.close()
+
+    def import_file(self, path, course_code, batch_size):
+        started = time.perf_counter()
+        errors = []
+        counts = {'added': 0, 'updated': 0, 'skipped': 0}
+
+        course = Course.objects.filter(code=course_code).first()
+        if course is None:
+            return path, course_code, counts, time.perf_counter() - started, [f'Course {course_code} does not exist.']
+
+        with open(path, newline='', encoding='utf-8') as csvfile, transaction.atomic():
+            reader = csv.DictReader(csvfile)
+            missing = [column for column in CSV_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                errors.append(f'missing column(s): {", ".join(missing)}')
+                return path, course_code, counts, time.perf_counter() - started, errors
+
+            # All questions from this file belong to one new version of the course's question bank.
+            # The version only goes up once something is really added or changed, so re-importing
+            # an unchanged file doesn't make every app download the questions again.
+            revision = None
+
+            rows = self.read_rows(reader, course, errors)
+            seen = set()
+            while True:
+                batch = list(islice(rows, batch_size))
+                if not batch:
+                    break
+
+                # One indexed lookup tells us which of this batch's questions the course already has.
+                existing = dict(
+                    Question.objects
+                    .filter(course=course, content_hash__in=[question.content_hash for line, question in batch])
+                    .values_list('content_hash', 'correct_answer')
+                )
+
+                added, updated, skipped = [], [], 0
+                for line, question in batch:
+                    if question.content_hash in seen:
+                        skipped += 1  # the same question appears twice in this file
+                        continue
+                    seen.add(question.content_hash)
+
+                    if question.content_hash not in existing:
+                        added.append(question)
+                    elif existing[question.content_hash] != question.correct_answer:
+                        updated.append(question)  # e.g. the answer key was fixed
+                    else:
+                        skipped += 1
+
+                # Each batch gets its own savepoint: if it fails, only that batch is rolled back.
+                bumped = False
+                try:
+                    with transaction.atomic():
+                        if added or updated:
+                            if revision is None:
+                                revision = bump_question_bank_version(course.pk)
+                                bumped = True
+                            for question in added + updated:
+                                question.revision = revision
+                            Question.objects.bulk_create(
+                                added + updated,
+                                update_conflicts=True,
+                                unique_fields=['course', 'content_hash'],
+                                update_fields=UPDATE_FIELDS,
+                            )
+                except DatabaseError as e:
+                    if bumped:
+                        revision = None  # the version bump was rolled back with the batch
+                    errors.append(f'lines {batch[0][0]}-{batch[-1][0]} were not imported: {e}')
+                else:
+                    counts['added'] += len(added)
+                    counts['updated'] += len(updated)
+                    counts['skipped'] += skipped
+
+            Course.objects.filter(pk=course.pk).update(question_count=F('question_count') + counts['added'])
+
+        return path, course_code, counts, time.perf_counter() - started, errors
+
+    def read_rows(self, reader, course, errors):
+        # Reads the CSV one row at a time and turns each good row into an (unsaved) Question.
+        for row in reader:
+            line = reader.line_num
+            correct_answer = (row['correct_answer'] or '').strip().upper()
+
+            if not (row['question_text'] or '').strip():
+                errors.append(f'line {line}: question_text is empty')
+                continue
+            if correct_answer not in ('A', 'B', 'C', 'D'):
+                errors.append(f'line {line}: correct_answer must be A, B, C or D, got {row["correct_answer"]!r}')
+                continue
+            too_long = [f for f in ('option_a', 'option_b', 'option_c', 'option_d') if len(row[f] or '') > OPTION_MAX_LENGTH]
+            if too_long:
+                errors.append(f'line {line}: {", ".join(too_long)} longer than {OPTION_MAX_LENGTH} characters')
+                continue
+
+            question = Question(
+                course=course,
+                question_text=row['question_text'],
+                option_a=row['option_a'] or '',
+                option_b=row['option_b'] or '',
+                option_c=row['option_c'] or '',
+                option_d=row['option_d'] or '',
+                correct_answer=correct_answer,
+            )
+            question.content_hash = question.compute_content_hash()
+            yield line, question
@@ -0,0 +1,43 @@
+# Import the tools we need
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from quiz.models import PeriodScore
+
+
+class Command(BaseCommand):
+    help = 'Deletes weekly and monthly leaderboard rows (PeriodScore) for periods that are over and no longer shown.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--keep-weeks', type=int, default=8, help='How many past weeks to keep, besides this one.')
+        parser.add_argument('--keep-months', type=int, default=12, help='How many past months to keep, besides this one.')
+        parser.add_argument('--batch-size', type=int, default=5000, help='How many rows to delete per query.')
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        this_week = PeriodScore.start_of('week', now)
+        this_month = PeriodScore.start_of('month', now)
+
+        # The first period we still keep.
+        keep_week = this_week - timedelta(weeks=options['keep_weeks'])
+        keep_month = this_month
+        for _ in range(options['keep_months']):
+            keep_month = (keep_month - timedelta(days=1)).replace(day=1)
+
+        for period, cutoff in (('week', keep_week), ('month', keep_month)):
+            deleted = self.delete_in_batches(
+                PeriodScore.objects.filter(period=period, period_start__lt=cutoff), options['batch_size'],
+            )
+            self.stdout.write(self.style.SUCCESS(f'{period}: deleted {deleted} rows from before {cutoff}.'))
+
+    def delete_in_batches(self, scores, batch_size):
+        # Small deletes, each in its own transaction, so the table is never locked for long.
+        total = 0
+        while True:
+            ids = list(scores.values_list('pk', flat=True)[:batch_size])
+            if not ids:
+                return total
+            PeriodScore.objects.filter(pk__in=ids).delete()
+            total += len(ids)
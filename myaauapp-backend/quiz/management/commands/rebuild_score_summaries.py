@@ -0,0 +1,66 @@
+# Import the tools we need
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Max, Sum
+
+from quiz.models import QuizScore, ScoreBucket, UserScoreSummary
+
+
+class Command(BaseCommand):
+    help = ('Rebuilds the overall leaderboard (UserScoreSummary) and the course score histograms '
+            '(ScoreBucket) from everyone\'s best QuizScore rows.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='How many summary rows to insert per query.')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+
+        # The database adds up every user's scores in one GROUP BY; we only stream the results.
+        totals = (
+            QuizScore.objects.values('user_id')
+            .annotate(total=Sum('highest_score'), courses=Count('pk'), last=Max('achieved_at'))
+            .order_by('user_id')
+            .iterator(chunk_size=options['batch_size'])
+        )
+        summaries = (
+            UserScoreSummary(
+                user_id=row['user_id'],
+                total_score=row['total'],
+                courses_taken=row['courses'],
+                average_score=row['total'] / row['courses'],
+                achieved_at=row['last'],
+            )
+            for row in totals
+        )
+
+        count = 0
+        # Everything is swapped in one transaction, so the leaderboard is never half built.
+        with transaction.atomic():
+            UserScoreSummary.objects.all().delete()
+            while True:
+                batch = list(islice(summaries, options['batch_size']))
+                if not batch:
+                    break
+                UserScoreSummary.objects.bulk_create(batch)
+                count += len(batch)
+
+            # Every course's histogram comes from one GROUP BY too.
+            buckets = (
+                QuizScore.objects.values('course_id', 'highest_score')
+                .annotate(n=Count('pk'))
+                .values_list('course_id', 'highest_score', 'n')
+            )
+            ScoreBucket.objects.all().delete()
+            bucket_count = len(ScoreBucket.objects.bulk_create(
+                [ScoreBucket(course_id=course_id, score=score, count=n) for course_id, score, n in buckets],
+                batch_size=options['batch_size'],
+            ))
+
+        seconds = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'Rebuilt {count} score summaries and {bucket_count} histogram buckets in {seconds:.2f}s.'
+        ))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from quiz.models import Course
+
+
+class Command(BaseCommand):
+    help = ('Counts every course\'s questions and scorers again. Run it after loaddata: '
+            'fixtures skip the signals that normally keep Course.question_count and scorer_count up to date.')
+
+    def handle(self, *args, **options):
+        updated = Course.refresh_all_counts()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed the question and scorer counts of {updated} courses.'))
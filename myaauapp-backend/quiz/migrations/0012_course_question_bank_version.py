@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0011_alter_course_code_alter_course_title_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='question_bank_version',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
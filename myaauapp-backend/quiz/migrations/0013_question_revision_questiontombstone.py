@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0012_course_question_bank_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('question_id', models.BigIntegerField()),
+                ('revision', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AddField(
+            model_name='question',
+            name='revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='question',
+            index=models.Index(fields=['course', 'revision'], name='quiz_questi_course__2578cf_idx'),
+        ),
+        migrations.AddField(
+            model_name='questiontombstone',
+            name='course',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='question_tombstones', to='quiz.course'),
+        ),
+        migrations.AddIndex(
+            model_name='questiontombstone',
+            index=models.Index(fields=['course', 'revision'], name='quiz_questi_course__89df6e_idx'),
+        ),
+    ]
@@ -0,0 +1,53 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:02
+
+from django.db import migrations, models
+from django.db.models import F
+
+from quiz.text import question_content_hash
+
+
+def fill_content_hashes(apps, schema_editor):
+    # Works out the hash of every existing question and deletes the duplicates
+    # (keeping the oldest copy) so the unique constraint in the next migration can be added.
+    Course = apps.get_model('quiz', 'Course')
+    Question = apps.get_model('quiz', 'Question')
+    QuestionTombstone = apps.get_model('quiz', 'QuestionTombstone')
+
+    seen = set()
+    to_update = []
+    duplicates = []
+    for question in Question.objects.order_by('pk').iterator(chunk_size=2000):
+        question.content_hash = question_content_hash(
+            question.question_text, question.option_a, question.option_b, question.option_c, question.option_d,
+        )
+        key = (question.course_id, question.content_hash)
+        if key in seen:
+            duplicates.append(question)
+            continue
+        seen.add(key)
+        to_update.append(question)
+
+    Question.objects.bulk_update(to_update, ['content_hash'], batch_size=1000)
+
+    for question in duplicates:
+        Course.objects.filter(pk=question.course_id).update(question_bank_version=F('question_bank_version') + 1)
+        version = Course.objects.values_list('question_bank_version', flat=True).get(pk=question.course_id)
+        QuestionTombstone.objects.create(course_id=question.course_id, question_id=question.pk, revision=version)
+    Question.objects.filter(pk__in=[question.pk for question in duplicates]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0013_question_revision_questiontombstone'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='question',
+            name='content_hash',
+            field=models.CharField(default='', editable=False, max_length=64),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_content_hashes, migrations.RunPython.noop),
+    ]
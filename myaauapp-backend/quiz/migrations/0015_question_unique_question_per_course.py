@@ -0,0 +1,17 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0014_question_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='question',
+            constraint=models.UniqueConstraint(fields=('course', 'content_hash'), name='unique_question_per_course'),
+        ),
+    ]
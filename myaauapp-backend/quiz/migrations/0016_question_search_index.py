@@ -0,0 +1,26 @@
+# Generated by Django 5.2.3 on 2026-10-18 07:40
+
+from django.db import migrations
+
+from quiz.search import install_search_index, uninstall_search_index
+
+
+def install(apps, schema_editor):
+    install_search_index(schema_editor.connection)
+
+
+def uninstall(apps, schema_editor):
+    uninstall_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0015_question_unique_question_per_course'),
+    ]
+
+    operations = [
+        # The search column/table is managed with raw SQL because it is different on
+        # PostgreSQL and SQLite (see quiz/search.py), so Django's model doesn't know about it.
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,58 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:05
+
+from django.db import migrations
+from django.db.models import F
+
+
+def normalize_course_codes(apps, schema_editor):
+    # Puts every course code in capitals without spaces. If that makes two courses
+    # share a code (e.g. "gst101" and "GST101"), they are merged into the oldest one
+    # so the unique constraint in the next migration can be added.
+    Course = apps.get_model('quiz', 'Course')
+    Question = apps.get_model('quiz', 'Question')
+    QuestionTombstone = apps.get_model('quiz', 'QuestionTombstone')
+    QuizScore = apps.get_model('quiz', 'QuizScore')
+
+    keepers = {}
+    for course in Course.objects.order_by('pk'):
+        code = ''.join(course.code.split()).upper()
+        keeper = keepers.get(code)
+
+        if keeper is None:
+            keepers[code] = course
+            if course.code != code:
+                Course.objects.filter(pk=course.pk).update(code=code)
+            continue
+
+        # The moved questions get the keeper's next question bank version, so offline packs pick them up.
+        Course.objects.filter(pk=keeper.pk).update(question_bank_version=F('question_bank_version') + 1)
+        version = Course.objects.values_list('question_bank_version', flat=True).get(pk=keeper.pk)
+
+        # Questions the keeper already has would break its unique content hashes, so those are dropped.
+        known = set(Question.objects.filter(course=keeper).values_list('content_hash', flat=True))
+        Question.objects.filter(course=course, content_hash__in=known).delete()
+        Question.objects.filter(course=course).update(course=keeper, revision=version)
+        QuestionTombstone.objects.filter(course=course).update(course=keeper)
+
+        # Each user keeps their better score of the two.
+        for score in QuizScore.objects.filter(course=course):
+            existing = QuizScore.objects.filter(course=keeper, user_id=score.user_id).first()
+            if existing is None:
+                QuizScore.objects.filter(pk=score.pk).update(course=keeper)
+            else:
+                if score.highest_score > existing.highest_score:
+                    QuizScore.objects.filter(pk=existing.pk).update(highest_score=score.highest_score)
+                score.delete()
+
+        course.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0016_question_search_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_course_codes, migrations.RunPython.noop),
+    ]
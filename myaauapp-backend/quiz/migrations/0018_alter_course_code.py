@@ -0,0 +1,18 @@
+# Generated by Django 5.2.3 on 2026-10-18 08:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0017_normalize_course_codes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='course',
+            name='code',
+            field=models.CharField(max_length=20, unique=True),
+        ),
+    ]
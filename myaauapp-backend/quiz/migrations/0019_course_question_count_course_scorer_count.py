@@ -0,0 +1,34 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:40
+
+from django.db import migrations, models
+
+
+def fill_counts(apps, schema_editor):
+    Course = apps.get_model('quiz', 'Course')
+    courses = Course.objects.annotate(
+        n_questions=models.Count('questions', distinct=True),
+        n_scorers=models.Count('course_highest_scores', distinct=True),
+    )
+    for course in courses:
+        Course.objects.filter(pk=course.pk).update(question_count=course.n_questions, scorer_count=course.n_scorers)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0018_alter_course_code'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='course',
+            name='question_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='course',
+            name='scorer_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_counts, migrations.RunPython.noop),
+    ]
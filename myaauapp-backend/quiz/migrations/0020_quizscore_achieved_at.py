@@ -0,0 +1,25 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:41
+
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0019_course_question_count_course_scorer_count'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='quizscore',
+            name='achieved_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddIndex(
+            model_name='quizscore',
+            index=models.Index(fields=['course', '-highest_score', 'achieved_at'], name='quiz_score_rank_idx'),
+        ),
+    ]
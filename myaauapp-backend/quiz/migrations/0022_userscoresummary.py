@@ -0,0 +1,50 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:45
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+def fill_summaries(apps, schema_editor):
+    QuizScore = apps.get_model('quiz', 'QuizScore')
+    UserScoreSummary = apps.get_model('quiz', 'UserScoreSummary')
+    totals = (
+        QuizScore.objects.values('user_id')
+        .annotate(total=models.Sum('highest_score'), courses=models.Count('pk'), last=models.Max('achieved_at'))
+        .order_by('user_id')
+    )
+    UserScoreSummary.objects.bulk_create([
+        UserScoreSummary(
+            user_id=row['user_id'],
+            total_score=row['total'],
+            courses_taken=row['courses'],
+            average_score=row['total'] / row['courses'],
+            achieved_at=row['last'],
+        )
+        for row in totals
+    ], batch_size=1000)
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0021_quizattempt'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserScoreSummary',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='score_summary', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('total_score', models.IntegerField(default=0)),
+                ('courses_taken', models.PositiveIntegerField(default=0)),
+                ('average_score', models.FloatField(default=0)),
+                ('achieved_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['-total_score', 'achieved_at'], name='quiz_summary_total_idx'), models.Index(fields=['-average_score', 'achieved_at'], name='quiz_summary_average_idx')],
+            },
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:49
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0022_userscoresummary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuestionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('choice', models.CharField(blank=True, max_length=1)),
+                ('answers', models.PositiveBigIntegerField(default=0)),
+                ('total_time_ms', models.PositiveBigIntegerField(default=0)),
+                ('score_sum', models.FloatField(default=0)),
+                ('score_sq_sum', models.FloatField(default=0)),
+                ('question', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='answer_stats', to='quiz.question')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('question', 'choice'), name='unique_question_stats_choice')],
+            },
+        ),
+    ]
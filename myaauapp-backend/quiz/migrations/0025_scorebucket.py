@@ -0,0 +1,40 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:51
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def fill_buckets(apps, schema_editor):
+    QuizScore = apps.get_model('quiz', 'QuizScore')
+    ScoreBucket = apps.get_model('quiz', 'ScoreBucket')
+    buckets = (
+        QuizScore.objects.values('course_id', 'highest_score')
+        .annotate(n=models.Count('pk'))
+        .values_list('course_id', 'highest_score', 'n')
+    )
+    ScoreBucket.objects.bulk_create(
+        [ScoreBucket(course_id=course_id, score=score, count=n) for course_id, score, n in buckets],
+        batch_size=1000,
+    )
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0024_practicestate'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('score', models.IntegerField()),
+                ('count', models.IntegerField(default=0)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='score_buckets', to='quiz.course')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('course', 'score'), name='unique_score_bucket')],
+            },
+        ),
+        migrations.RunPython(fill_buckets, migrations.RunPython.noop),
+    ]
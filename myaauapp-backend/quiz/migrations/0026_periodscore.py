@@ -0,0 +1,33 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:52
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0025_scorebucket'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PeriodScore',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('period', models.CharField(choices=[('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period_start', models.DateField()),
+                ('highest_score', models.IntegerField(default=0)),
+                ('achieved_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_scores', to='quiz.course')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='period_scores', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'period', 'period_start', '-highest_score', 'achieved_at'], name='quiz_period_rank_idx'), models.Index(fields=['period_start'], name='quiz_period_start_idx')],
+                'constraints': [models.UniqueConstraint(fields=('user', 'course', 'period', 'period_start'), name='unique_period_score')],
+            },
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.3 on 2026-10-18 06:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('quiz', '0026_periodscore'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobpost',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+        migrations.AddField(
+            model_name='scholarshippost',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -1,15 +1,66 @@
-from django.db import models
+from datetime import timedelta
+
+from django.db import connection, models, transaction
+from django.db.models import Count, F, Max, Sum
+from django.db.models.functions import Coalesce
+from django.db.models.signals import pre_save, post_save, post_delete # These listen for "save" and "delete" signals
+from django.dispatch import receiver # This helps connect our functions to the signals
 from django.conf import settings
+from django.utils import timezone
+
+from .text import normalize_course_code, question_content_hash
 
 # Create your models here.
 class Course(models.Model):
-    code = models.CharField(max_length=20)  # e.g., GST101, GST102
+    # e.g., GST101, GST102. Always stored in capitals without spaces, and each code can only be used once.
+    code = models.CharField(max_length=20, unique=True)
     title = models.CharField(max_length=100)  # e.g., Use of English
 
+    # Goes up by one every time a question in this course is added, changed or deleted.
+    # We use it to know when a cached copy of the question bank is out of date.
+    question_bank_version = models.PositiveIntegerField(default=0)
+
+    # Kept up to date as questions and scores are written, so the course list
+    # never has to count rows (see the signals below, refresh_counts and the
+    # refresh_course_counts management command).
+    question_count = models.PositiveIntegerField(default=0)
+    scorer_count = models.PositiveIntegerField(default=0)
+
+    def save(self, *args, **kwargs):
+        self.code = normalize_course_code(self.code)
+        super().save(*args, **kwargs)
+
+    def refresh_counts(self):
+        # Counts the rows again, for when the stored counts can't be trusted (e.g. after loaddata).
+        self.question_count = self.questions.count()
+        self.scorer_count = self.course_highest_scores.count()
+        Course.objects.filter(pk=self.pk).update(question_count=self.question_count, scorer_count=self.scorer_count)
+
+    @staticmethod
+    def refresh_all_counts():
+        # refresh_counts for every course at once, in one UPDATE. Returns how many courses were updated.
+        def count_of(model):
+            per_course = (
+                model.objects.filter(course_id=models.OuterRef('pk'))
+                .order_by().values('course_id').annotate(n=Count('pk')).values('n')
+            )
+            return Coalesce(models.Subquery(per_course), 0)
+
+        return Course.objects.update(question_count=count_of(Question), scorer_count=count_of(QuizScore))
+
     def __str__(self):
         return self.code
 
 
+# The hot quiz endpoints remember which id belongs to which course code (see quiz/courses.py).
+# When a course is added, renamed or deleted, this process forgets what it remembered.
+@receiver(post_save, sender=Course)
+@receiver(post_delete, sender=Course)
+def forget_cached_course_ids(sender, **kwargs):
+    from .courses import forget_course_ids
+    forget_course_ids()
+
+
 class Question(models.Model):
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='questions')
     question_text = models.TextField()
@@ -21,10 +72,146 @@ class Question(models.Model):
 
     correct_answer = models.CharField(max_length=1)  # A, B, C or D
 
+    # The course's question_bank_version at the moment this question was last saved.
+    # Mobile clients use it to download only the questions that changed (see quiz/packs.py).
+    revision = models.PositiveIntegerField(default=0)
+
+    # A fingerprint of the question text and options (see quiz/text.py).
+    # The same question can only be in a course once, so importing a file twice doesn't duplicate it.
+    content_hash = models.CharField(max_length=64, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'revision']),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'content_hash'], name='unique_question_per_course'),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Bumping the course version and writing the question happen together,
+        # so nobody can see the new version without also seeing this question.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    def compute_content_hash(self):
+        return question_content_hash(self.question_text, self.option_a, self.option_b, self.option_c, self.option_d)
+
     def __str__(self):
         return f"{self.course.code}: {self.question_text[:50]}"
 
 
+class QuestionTombstone(models.Model):
+    # A note that a question was deleted, so offline clients can remove it too.
+    # db_constraint=False because tombstones are written while a course is being
+    # deleted as well, and the database must not refuse that.
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='question_tombstones', db_constraint=False)
+    question_id = models.BigIntegerField()
+    revision = models.PositiveIntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['course', 'revision']),
+        ]
+
+    def __str__(self):
+        return f"Question {self.question_id} removed from course {self.course_id} at v{self.revision}"
+
+
+class QuestionStats(models.Model):
+    # How often each option of a question was picked, added up from the answers sent
+    # with quiz results (see quiz/buffers.py and quiz/answer_stats.py).
+    # We count options rather than right/wrong, so fixing a question's answer key
+    # fixes its statistics too.
+    question = models.ForeignKey(Question, on_delete=models.CASCADE, related_name='answer_stats')
+    choice = models.CharField(max_length=1, blank=True) # A, B, C or D, or blank if the question was skipped
+    answers = models.PositiveBigIntegerField(default=0)
+    total_time_ms = models.PositiveBigIntegerField(default=0)
+    # The quiz scores (0 to 1) of everyone who picked this option, added up, and their squares added up.
+    # Enough to tell whether strong students pick the right answer more often than weak ones.
+    score_sum = models.FloatField(default=0)
+    score_sq_sum = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['question', 'choice'], name='unique_question_stats_choice'),
+        ]
+
+    def __str__(self):
+        return f"Question {self.question_id} option {self.choice or '-'}: {self.answers} answers"
+
+
+def bump_question_bank_version(course_id, question_count_change=0):
+    """
+    Adds one to a course's question_bank_version and returns the new value.
+    Done in a single UPDATE ... RETURNING so two writers can never get the same number.
+    question_count_change is added to the course's question_count in the same statement.
+    The count never goes below 0, even if it was wrong already (e.g. after loaddata).
+    """
+    table = connection.ops.quote_name(Course._meta.db_table)
+    greatest = 'GREATEST' if connection.vendor == 'postgresql' else 'MAX'
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'UPDATE {table} SET question_bank_version = question_bank_version + 1, '
+            f'question_count = {greatest}(question_count + %s, 0) '
+            f'WHERE id = %s RETURNING question_bank_version',
+            [question_count_change, course_id],
+        )
+        row = cursor.fetchone()
+    return row[0] if row else None
+
+
+# Whenever a question is saved or deleted, we bump its course's question_bank_version
+# so the cached question bank for that course (see quiz/question_bank.py) is thrown away.
+# Saved questions remember the new version in their revision field and deleted ones
+# leave a tombstone behind, which is what the offline delta sync reads.
+# Saved questions also get their content_hash worked out again here.
+# New questions add one to the course's question_count at the same time (moved ones move it along).
+@receiver(pre_save, sender=Question)
+def stamp_question(sender, instance, raw=False, **kwargs):
+    instance.content_hash = instance.compute_content_hash()
+    # Fixtures (raw saves) may be updating rows that already exist, so we can't tell if
+    # they are new. After loaddata, run `python manage.py refresh_course_counts` to fix the counts.
+    old_course_id = previous_course_id(instance, raw)
+    count_change = 1 if (instance._state.adding and not raw) or old_course_id is not None else 0
+    version = bump_question_bank_version(instance.course_id, count_change)
+    if version is not None:
+        instance.revision = version
+
+    # A question moved to another course (e.g. in the admin) has left its old course too,
+    # so the old course's cached question bank is out of date as well, and offline packs of
+    # the old course get a tombstone to remove it. If the question had been in the new course
+    # before, its old tombstone there is dropped: the question is back.
+    # The question is counted in the new course (above) instead of the old one.
+    if old_course_id is not None:
+        old_version = bump_question_bank_version(old_course_id, -1)
+        if old_version is not None:
+            QuestionTombstone.objects.create(course_id=old_course_id, question_id=instance.pk, revision=old_version)
+        QuestionTombstone.objects.filter(course_id=instance.course_id, question_id=instance.pk).delete()
+
+
+def previous_course_id(instance, raw=False):
+    # The course a saved question is being moved away from, or None if it isn't moving.
+    if raw or instance._state.adding or instance.pk is None:
+        return None
+    old_course_id = Question.objects.filter(pk=instance.pk).values_list('course_id', flat=True).first()
+    return old_course_id if old_course_id not in (None, instance.course_id) else None
+
+
+@receiver(post_delete, sender=Question)
+def record_question_tombstone(sender, instance, **kwargs):
+    version = bump_question_bank_version(instance.course_id, -1)
+    if version is not None:
+        QuestionTombstone.objects.create(course_id=instance.course_id, question_id=instance.pk, revision=version)
+
+
+@receiver(post_delete, sender=Course)
+def clear_course_tombstones(sender, instance, **kwargs):
+    # The questions of a deleted course leave tombstones behind while the course is
+    # being removed; nobody can ask for them any more, so we tidy them up here.
+    QuestionTombstone.objects.filter(course_id=instance.pk).delete()
+
+
 class JobPost(models.Model):
     title = models.CharField(max_length=255)
     link = models.URLField(unique=True)
@@ -38,6 +225,10 @@ class JobPost(models.Model):
     #auto_now_add=True sets it only when the job is first created in our DB
     scraped_at = models.DateTimeField(auto_now_add=True)
 
+    #A fingerprint of the title, summary, date and image (see save_posts in quiz/tasks.py).
+    #If a scraped post has the same fingerprint, nothing changed and the row isn't written again.
+    content_hash = models.CharField(max_length=64, blank=True, default='')
+
     #this helps us see a nice name for the job when we look at in Django's admin
     def __str__(self):
         return self.title
@@ -57,6 +248,7 @@ class ScholarshipPost(models.Model):
     source = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    content_hash = models.CharField(max_length=64, blank=True, default='') # Same as JobPost.content_hash
 
     def __str__(self):
         return self.title
@@ -78,13 +270,199 @@ class QuizScore(models.Model):
     # 3. What was their highest score for this course? We'll store it as a whole number.
     highest_score = models.IntegerField(default=0) # Starts at 0 if no score yet.
 
+    # 4. When did they first reach that highest score? Used to break ties on the leaderboard.
+    achieved_at = models.DateTimeField(default=timezone.now)
+
     # This special part ensures that for any ONE user and any ONE course,
     # there can only be ONE entry in this table.
     # This is how we make sure we only store the *highest* score per user per course.
     class Meta:
         unique_together = ('user', 'course') # Means the combination of user AND course must be unique.
         ordering = ['-highest_score']        # Default way to sort scores (highest first).
+        indexes = [
+            # Lets the leaderboard be read in rank order and lets us count who is ahead of someone quickly.
+            models.Index(fields=['course', '-highest_score', 'achieved_at'], name='quiz_score_rank_idx'),
+        ]
 
     # This helps us see nice names in the Django Admin.
     def __str__(self):
         return f"{self.user.username}'s highest score for {self.course.code}: {self.highest_score}"
+
+
+class UserScoreSummary(models.Model):
+    # One row per user: their best scores from every course added up, for the overall leaderboard.
+    # record_best_score (quiz/scores.py) adds to it in the same transaction that raises a QuizScore,
+    # so the overall leaderboard never has to add up the whole QuizScore table.
+    # If it ever gets out of step: python manage.py rebuild_score_summaries
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='score_summary')
+    total_score = models.IntegerField(default=0)             # The user's best scores added up
+    courses_taken = models.PositiveIntegerField(default=0)   # How many courses they have a score in
+    average_score = models.FloatField(default=0)             # total_score / courses_taken
+    achieved_at = models.DateTimeField(default=timezone.now) # When the total last went up, used to break ties
+
+    class Meta:
+        indexes = [
+            # Let the overall leaderboard be read in rank order, by total or by average.
+            models.Index(fields=['-total_score', 'achieved_at'], name='quiz_summary_total_idx'),
+            models.Index(fields=['-average_score', 'achieved_at'], name='quiz_summary_average_idx'),
+        ]
+
+    @staticmethod
+    def refresh_for_user(user_id, create=True):
+        # Adds up one user's QuizScore rows again. Used when a score is changed or deleted
+        # outside record_best_score (e.g. in the Django Admin).
+        totals = QuizScore.objects.filter(user_id=user_id).aggregate(
+            total=Sum('highest_score'), courses=Count('pk'), last=Max('achieved_at'),
+        )
+        if not totals['courses']:
+            UserScoreSummary.objects.filter(user_id=user_id).delete()
+            return
+
+        values = {
+            'total_score': totals['total'],
+            'courses_taken': totals['courses'],
+            'average_score': totals['total'] / totals['courses'],
+            'achieved_at': totals['last'],
+        }
+        updated = UserScoreSummary.objects.filter(user_id=user_id).update(**values)
+        if not updated and create:
+            UserScoreSummary.objects.create(user_id=user_id, **values)
+
+    def __str__(self):
+        return f"{self.user.username}: {self.total_score} over {self.courses_taken} course(s)"
+
+
+class PeriodScore(models.Model):
+    # A user's best score in a course during one week or one month, for the weekly and
+    # monthly leaderboards. Works like QuizScore, but every period starts from zero, so
+    # new students have a chance at the top. record_best_score (quiz/scores.py) keeps these
+    # up to date; old periods are removed with: python manage.py prune_period_scores
+    PERIODS = ['week', 'month']
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='period_scores')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='period_scores')
+    period = models.CharField(max_length=5, choices=[('week', 'Week'), ('month', 'Month')])
+    period_start = models.DateField() # The Monday of the week, or the 1st of the month
+    highest_score = models.IntegerField(default=0)
+    achieved_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course', 'period', 'period_start'], name='unique_period_score'),
+        ]
+        indexes = [
+            # One period's leaderboard in rank order, without looking at any other period.
+            models.Index(fields=['course', 'period', 'period_start', '-highest_score', 'achieved_at'], name='quiz_period_rank_idx'),
+            # Lets old periods be found and deleted quickly.
+            models.Index(fields=['period_start'], name='quiz_period_start_idx'),
+        ]
+
+    @staticmethod
+    def start_of(period, when):
+        # The first day of the week ('week') or month ('month') that `when` falls in.
+        day = timezone.localtime(when).date()
+        if period == 'week':
+            return day - timedelta(days=day.weekday())
+        return day.replace(day=1)
+
+    def __str__(self):
+        return f"{self.user.username}'s best in {self.course.code} for the {self.period} of {self.period_start}: {self.highest_score}"
+
+
+class QuizAttempt(models.Model):
+    # One row for every quiz a user finishes, so we can draw their progress over time.
+    # QuizScore only keeps the best one. These rows are written in batches (see quiz/buffers.py).
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='quiz_attempts')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='attempts')
+    score = models.IntegerField()
+    duration_seconds = models.PositiveIntegerField(blank=True, null=True) # How long the quiz took, if the app sent it
+    taken_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ['-taken_at']
+        indexes = [
+            # "My attempts between these dates", for all courses or for one course.
+            models.Index(fields=['user', 'taken_at'], name='quiz_attempt_user_idx'),
+            models.Index(fields=['user', 'course', 'taken_at'], name='quiz_attempt_user_course_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} scored {self.score} in {self.course.code} at {self.taken_at:%Y-%m-%d %H:%M}"
+
+
+class ScoreBucket(models.Model):
+    # A course's score histogram: how many users have `score` as their best score.
+    # record_best_score (quiz/scores.py) moves users between buckets as their best score goes up,
+    # so "you beat X% of students" adds up a few dozen buckets instead of counting QuizScore rows.
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='score_buckets')
+    score = models.IntegerField()
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['course', 'score'], name='unique_score_bucket'),
+        ]
+
+    @staticmethod
+    def rebuild_for_course(course_id):
+        # Counts the course's QuizScore rows again, for when a score was changed some other way.
+        counts = (
+            QuizScore.objects.filter(course_id=course_id)
+            .values('highest_score').annotate(n=Count('pk')).values_list('highest_score', 'n')
+        )
+        ScoreBucket.objects.filter(course_id=course_id).delete()
+        ScoreBucket.objects.bulk_create(
+            [ScoreBucket(course_id=course_id, score=score, count=n) for score, n in counts]
+        )
+
+    def __str__(self):
+        return f"{self.course.code}: {self.count} scored {self.score}"
+
+
+class PracticeState(models.Model):
+    # A user's spaced-repetition progress in one course: one small packed record per question
+    # they have practised, all in one bytes value (see quiz/practice.py).
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='practice_states')
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name='practice_states')
+    state = models.BinaryField(default=b'')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'course'], name='unique_practice_state_per_course'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username}'s practice in {self.course.code}"
+
+
+# Keeps Course.scorer_count, the user's UserScoreSummary, the course's score histogram and
+# the course leaderboard up to date when a score is saved or removed through the ORM.
+# Quiz submissions don't come through here: record_best_score (quiz/scores.py) updates them itself.
+@receiver(post_save, sender=QuizScore)
+def count_new_scorer(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        # Fixtures: `python manage.py refresh_course_counts` and rebuild_score_summaries fix things afterwards.
+        return
+    if created:
+        Course.objects.filter(pk=instance.course_id).update(scorer_count=F('scorer_count') + 1)
+    # We don't know what the score was before an edit, so the histogram is counted again.
+    ScoreBucket.rebuild_for_course(instance.course_id)
+    UserScoreSummary.refresh_for_user(instance.user_id)
+    forget_leaderboard(instance.course_id)
+
+
+@receiver(post_delete, sender=QuizScore)
+def uncount_scorer(sender, instance, **kwargs):
+    Course.objects.filter(pk=instance.course_id).update(scorer_count=F('scorer_count') - 1)
+    ScoreBucket.objects.filter(course_id=instance.course_id, score=instance.highest_score).update(count=F('count') - 1)
+    # create=False: if the user themselves is being deleted, their summary may already be gone.
+    UserScoreSummary.refresh_for_user(instance.user_id, create=False)
+    forget_leaderboard(instance.course_id)
+
+
+def forget_leaderboard(course_id):
+    # The course leaderboard backend may hold a copy of the scores (see quiz/leaderboards.py).
+    # Once this transaction is saved, it reads them again from the database.
+    from .leaderboards import get_leaderboard_backend
+    transaction.on_commit(lambda: get_leaderboard_backend().forget(course_id))
@@ -0,0 +1,73 @@
+# quiz/packs.py
+#
+# Offline question packs for the mobile app.
+# A pack is a whole course's question bank squeezed into gzip'd JSON. Instead of
+# repeating the field names for every question (like the normal API does), each
+# question is a plain list and the field names are sent once at the top.
+# A delta has the same shape, but only holds the questions that were added or
+# changed after a version the phone already has, plus the ids that were removed.
+
+import gzip
+import json
+
+from django.core.cache import cache
+
+from .models import Question, QuestionTombstone
+
+
+# The order of the values inside each question list.
+PACK_FIELDS = ['id', 'question_text', 'option_a', 'option_b', 'option_c', 'option_d', 'correct_answer']
+
+
+def _compress(data):
+    payload = json.dumps(data, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    return gzip.compress(payload)
+
+
+def _question_rows(queryset):
+    return [list(row) for row in queryset.order_by('pk').values_list(*PACK_FIELDS)]
+
+
+def pack_etag(course):
+    return f'"{course.code}-pack-v{course.question_bank_version}"'
+
+
+def get_question_pack(course):
+    """
+    Returns the gzip'd pack for the course's current question bank version.
+    """
+    cache_key = f'quiz:question-pack:{course.pk}:v{course.question_bank_version}'
+    pack = cache.get(cache_key)
+
+    if pack is None:
+        pack = _compress({
+            'course': course.code,
+            'version': course.question_bank_version,
+            'fields': PACK_FIELDS,
+            'questions': _question_rows(Question.objects.filter(course=course)),
+        })
+        cache.set(cache_key, pack, timeout=None)
+
+    return pack
+
+
+def get_question_delta(course, since):
+    """
+    Returns a gzip'd delta that brings a pack at version `since` up to date.
+    """
+    changed = Question.objects.filter(course=course, revision__gt=since)
+    removed = (
+        QuestionTombstone.objects
+        .filter(course=course, revision__gt=since)
+        .order_by('question_id')
+        .values_list('question_id', flat=True)
+    )
+
+    return _compress({
+        'course': course.code,
+        'since': since,
+        'version': course.question_bank_version,
+        'fields': PACK_FIELDS,
+        'questions': _question_rows(changed),
+        'removed': list(removed),
+    })
@@ -0,0 +1,14 @@
+# quiz/pagination.py
+
+from rest_framework.pagination import PageNumberPagination
+
+class LeaderboardPagination(PageNumberPagination):
+    page_size = 20 # This sets the number of scores per page
+    page_size_query_param = 'page_size' # Allows client to specify page size (e.g., ?page_size=50)
+    max_page_size = 100 # Maximum page size allowed if client requests more
+
+
+class AttemptPagination(PageNumberPagination):
+    page_size = 50 # Progress charts want a good number of points at once
+    page_size_query_param = 'page_size'
+    max_page_size = 500
@@ -0,0 +1,136 @@
+# quiz/practice.py
+#
+# Spaced-repetition practice (the SM-2 schedule used by flashcard apps).
+# Every question a user has practised gets a small record: when it is next due, how many
+# days until the one after that, and how easy the user finds it. Questions they get wrong
+# come back the next day; questions they keep getting right come back less and less often.
+#
+# All of a user's records for one course are packed into one bytes column (PracticeState.state),
+# 14 bytes per question, instead of one database row per question. Picking the next questions or
+# saving results is then one read and one write of that row, however big the question bank is.
+
+import struct
+from bisect import bisect_left
+
+from django.utils import timezone
+
+
+# question id, due day, interval in days, easiness x 100, repetitions in a row, last quality
+RECORD = struct.Struct('<IIHHBB')
+
+START_EASINESS = 250 # 2.5, as in SM-2
+MIN_EASINESS = 130   # 1.3
+MAX_INTERVAL = 3650  # Ten years is "learned"
+
+
+def today():
+    # Days are counted as date ordinals (1 = 1 January of year 1).
+    return timezone.localdate().toordinal()
+
+
+def unpack_state(blob):
+    # bytes -> {question id: [due, interval, easiness, repetitions, quality]}
+    return {record[0]: list(record[1:]) for record in RECORD.iter_unpack(bytes(blob or b''))}
+
+
+def pack_state(records):
+    return b''.join(RECORD.pack(question_id, *records[question_id]) for question_id in sorted(records))
+
+
+def in_course(question_ids, question_id):
+    # question_ids is the course's sorted id array from question_bank.get_question_ids.
+    index = bisect_left(question_ids, question_id)
+    return index < len(question_ids) and question_ids[index] == question_id
+
+
+def drop_removed_questions(records, question_ids):
+    # Forgets records for questions that are no longer in the course.
+    for question_id in list(records):
+        if not in_course(question_ids, question_id):
+            del records[question_id]
+
+
+def review(record, quality, day):
+    """
+    Updates one question's record after an answer. quality is 0-5 as in SM-2:
+    5 = perfect, 4 = right after some thought, 3 = right but hard, 0-2 = wrong.
+    """
+    if record is None:
+        record = [day, 0, START_EASINESS, 0, 0]
+    due, interval, easiness, repetitions, _ = record
+
+    if quality < 3:
+        # Wrong: start again with a short interval.
+        repetitions, interval = 0, 1
+    else:
+        repetitions += 1
+        if repetitions == 1:
+            interval = 1
+        elif repetitions == 2:
+            interval = 6
+        else:
+            interval = round(interval * easiness / 100)
+
+    change = 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    easiness = max(MIN_EASINESS, round(easiness + change * 100))
+    interval = min(max(interval, 1), MAX_INTERVAL)
+
+    return [day + interval, interval, easiness, min(repetitions, 255), quality]
+
+
+def choose_questions(records, question_ids, n, day):
+    """
+    Picks up to n question ids to practise: questions that are due first (the most overdue
+    and hardest first), then questions the user has never seen, then whatever is due soonest.
+    Returns (ids, due_count, new_count) where the counts are for the whole course.
+    """
+    due = sorted(
+        (record[0], record[2], question_id)
+        for question_id, record in records.items()
+        if record[0] <= day
+    )
+    picked = [question_id for _, _, question_id in due[:n]]
+
+    new_count = len(question_ids) - len(records)
+    if len(picked) < n:
+        for question_id in question_ids:
+            if question_id not in records:
+                picked.append(question_id)
+                if len(picked) == n:
+                    break
+
+    if len(picked) < n:
+        upcoming = sorted((record[0], question_id) for question_id, record in records.items() if record[0] > day)
+        picked.extend(question_id for _, question_id in upcoming[:n - len(picked)])
+
+    return picked, len(due), new_count
+
+
+def clean_reviews(value):
+    """
+    Checks the answers sent after a practice round:
+        [{"question": 12, "correct": true}, {"question": 15, "quality": 2}, ...]
+    "quality" (0-5) can be sent instead of "correct" by apps that ask how hard it felt.
+    Returns a list of (question_id, quality), or raises ValueError saying what is wrong.
+    """
+    if not isinstance(value, list) or not value or len(value) > 200:
+        raise ValueError("answers must be a list of 1 to 200 items.")
+
+    reviews = []
+    for answer in value:
+        if not isinstance(answer, dict):
+            raise ValueError("Each answer must look like {\"question\": 12, \"correct\": true}.")
+        try:
+            question_id = int(answer.get('question'))
+            if answer.get('quality') is not None:
+                quality = int(answer['quality'])
+            elif isinstance(answer.get('correct'), bool):
+                quality = 4 if answer['correct'] else 1
+            else:
+                raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError("Each answer needs a question id and either correct (true/false) or quality (0-5).")
+        if not 0 <= quality <= 5:
+            raise ValueError("quality must be between 0 and 5.")
+        reviews.append((question_id, quality))
+    return reviews
@@ -0,0 +1,73 @@
+# quiz/question_bank.py
+#
+# Helpers for serving a course's question bank quickly.
+# A course's questions only change when we import or edit them, so instead of
+# querying and serializing every question on every request we keep the finished
+# JSON bytes in Django's cache. The cache key contains the course's
+# question_bank_version, so editing a question (which bumps the version) makes
+# the old entry unreachable and the next request builds a fresh one.
+
+import random
+from array import array
+
+from django.core.cache import cache
+from rest_framework.renderers import JSONRenderer
+
+from .models import Question
+from .serializers import QuestionSerializer
+
+
+# course id -> (question_bank_version, array of that course's question ids).
+# This lives in the memory of each server process and is rebuilt the first time
+# it is asked for after the course's question bank changes.
+_question_id_index = {}
+
+
+def question_bank_etag(course):
+    # The ETag only changes when the course's questions change, so a client that
+    # already has this version can be answered with a tiny "304 Not Modified".
+    return f'"{course.code}-v{course.question_bank_version}"'
+
+
+def get_question_bank_payload(course):
+    """
+    Returns the whole question bank for a course as ready-to-send JSON bytes.
+    """
+    cache_key = f'quiz:question-bank:{course.pk}:v{course.question_bank_version}'
+    payload = cache.get(cache_key)
+
+    if payload is None:
+        questions = Question.objects.filter(course=course).order_by('pk')
+        serializer = QuestionSerializer(questions, many=True)
+        payload = JSONRenderer().render(serializer.data)
+        # Old versions are never asked for again, so the entry can live until
+        # the cache pushes it out on its own.
+        cache.set(cache_key, payload, timeout=None)
+
+    return payload
+
+
+def get_question_ids(course):
+    """
+    Returns the ids of every question in a course, sorted, as a compact array.
+    """
+    entry = _question_id_index.get(course.pk)
+    if entry is None or entry[0] != course.question_bank_version:
+        ids = Question.objects.filter(course=course).order_by('pk').values_list('pk', flat=True)
+        entry = (course.question_bank_version, array('q', ids))
+        _question_id_index[course.pk] = entry
+    return entry[1]
+
+
+def sample_questions(course, n, seed):
+    """
+    Picks n random questions from a course without asking the database to shuffle
+    the whole table (ORDER BY RANDOM() would read every row).
+    The same seed always gives the same questions, in the same order, for as long
+    as the course's question bank stays the same.
+    """
+    ids = get_question_ids(course)
+    picked = random.Random(seed).sample(ids, min(n, len(ids)))
+
+    questions = Question.objects.in_bulk(picked)
+    return [questions[pk] for pk in picked if pk in questions]
@@ -0,0 +1,201 @@
+# quiz/scores.py
+#
+# Saving quiz results.
+# A user's best score for a course is kept with one INSERT ... ON CONFLICT statement
+# (GREATEST on PostgreSQL, MAX on SQLite), so two submissions that arrive together
+# can't overwrite each other's higher score. The same transaction adds the change
+# to the user's overall total for the cross-course leaderboard, moves them in
+# the course's score histogram and keeps their best score of the week and month.
+
+from collections import namedtuple
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .answer_stats import record_answers
+from .buffers import attempt_log
+from .leaderboards import get_leaderboard_backend
+from .live import get_leaderboard_pusher
+from .models import Course, PeriodScore, QuizAttempt, QuizScore, ScoreBucket, UserScoreSummary
+
+
+# highest_score: the best score after this submission
+# previous_score: the best score before it (None if this was the user's first try)
+# created: True if this was the user's first score for the course
+# changed: True if the stored best score went up
+# score_id: the id of the user's QuizScore row for the course
+ScoreResult = namedtuple('ScoreResult', ['highest_score', 'previous_score', 'created', 'changed', 'score_id'])
+
+
+def _upsert_sql(returning):
+    table = connection.ops.quote_name(QuizScore._meta.db_table)
+    # PostgreSQL calls it GREATEST(); SQLite's MAX() does the same with two arguments.
+    greatest = 'GREATEST' if connection.vendor == 'postgresql' else 'MAX'
+    # Both the new highest_score and achieved_at are worked out from the row as it was
+    # before this statement, so achieved_at only moves when the score really goes up.
+    return f"""
+        INSERT INTO {table} (user_id, course_id, highest_score, achieved_at)
+        VALUES (%s, %s, %s, %s)
+        ON CONFLICT (user_id, course_id) DO UPDATE SET
+            highest_score = {greatest}({table}.highest_score, excluded.highest_score),
+            achieved_at = CASE
+                WHEN excluded.highest_score > {table}.highest_score THEN excluded.achieved_at
+                ELSE {table}.achieved_at
+            END
+        RETURNING {returning}
+    """
+
+
+def _upsert(cursor, user_id, course_id, score, achieved_at):
+    # Runs the upsert and returns (id, highest_score, previous_score, created).
+    table = connection.ops.quote_name(QuizScore._meta.db_table)
+    params = [user_id, course_id, score, achieved_at]
+
+    # The previous score is read just before the upsert, in the same transaction. On PostgreSQL
+    # FOR UPDATE locks the user's row until we commit, so no other submission can change it in between.
+    # (It can't be read inside the upsert: a subquery in RETURNING runs after the row has changed.)
+    lock = ' FOR UPDATE' if connection.vendor == 'postgresql' else ''
+    cursor.execute(f'SELECT highest_score FROM {table} WHERE user_id = %s AND course_id = %s{lock}', [user_id, course_id])
+    row = cursor.fetchone()
+
+    if connection.vendor == 'postgresql':
+        # xmax = 0 is PostgreSQL's way of saying "this row was just inserted". It tells us apart from
+        # another request that inserted the row after our SELECT found nothing.
+        cursor.execute(_upsert_sql('id, highest_score, (xmax = 0)'), params)
+        score_id, highest_score, created = cursor.fetchone()
+    else:
+        # SQLite lets only one connection write at a time, so nobody can get in between.
+        cursor.execute(_upsert_sql('id, highest_score'), params)
+        score_id, highest_score = cursor.fetchone()
+        created = row is None
+    return score_id, highest_score, row[0] if row else None, created
+
+
+def _add_to_summary(cursor, user_id, score_change, courses_change, achieved_at):
+    # Adds this submission's effect to the user's overall total. Adding (instead of
+    # counting everything again) means two submissions for different courses at the
+    # same moment both end up in the total.
+    table = connection.ops.quote_name(UserScoreSummary._meta.db_table)
+    greatest = 'GREATEST' if connection.vendor == 'postgresql' else 'MAX'
+    cursor.execute(
+        f"""
+        INSERT INTO {table} (user_id, total_score, courses_taken, average_score, achieved_at)
+        VALUES (%s, %s, %s, %s, %s)
+        ON CONFLICT (user_id) DO UPDATE SET
+            total_score = {table}.total_score + excluded.total_score,
+            courses_taken = {table}.courses_taken + excluded.courses_taken,
+            average_score = ({table}.total_score + excluded.total_score) * 1.0
+                / {greatest}({table}.courses_taken + excluded.courses_taken, 1),
+            achieved_at = excluded.achieved_at
+        """,
+        [user_id, score_change, courses_change, score_change / max(courses_change, 1), achieved_at],
+    )
+
+
+def _move_in_histogram(cursor, course_id, old_score, new_score):
+    # Moves the user from their old score's bucket (if they had one) to their new one.
+    table = connection.ops.quote_name(ScoreBucket._meta.db_table)
+    changes = [(course_id, new_score, 1)]
+    if old_score is not None:
+        changes.append((course_id, old_score, -1))
+    cursor.executemany(
+        f"""
+        INSERT INTO {table} (course_id, score, count) VALUES (%s, %s, %s)
+        ON CONFLICT (course_id, score) DO UPDATE SET count = {table}.count + excluded.count
+        """,
+        changes,
+    )
+
+
+def _record_period_scores(cursor, user_id, course_id, score, taken_at, achieved_at):
+    # Keeps the best score of this week and of this month, in one statement with a row per period.
+    # A score sent in late (e.g. from an offline phone) goes to the period it was taken in.
+    table = connection.ops.quote_name(PeriodScore._meta.db_table)
+    greatest = 'GREATEST' if connection.vendor == 'postgresql' else 'MAX'
+    rows = [
+        (user_id, course_id, period, connection.ops.adapt_datefield_value(PeriodScore.start_of(period, taken_at)), score, achieved_at)
+        for period in PeriodScore.PERIODS
+    ]
+    values = ', '.join(['(%s, %s, %s, %s, %s, %s)'] * len(rows))
+    cursor.execute(
+        f"""
+        INSERT INTO {table} (user_id, course_id, period, period_start, highest_score, achieved_at)
+        VALUES {values}
+        ON CONFLICT (user_id, course_id, period, period_start) DO UPDATE SET
+            highest_score = {greatest}({table}.highest_score, excluded.highest_score),
+            achieved_at = CASE
+                WHEN excluded.highest_score > {table}.highest_score THEN excluded.achieved_at
+                ELSE {table}.achieved_at
+            END
+        """,
+        [value for row in rows for value in row],
+    )
+
+
+def record_best_score(user_id, course_id, score, achieved_at=None):
+    """
+    Keeps the higher of `score` and the user's stored best score for the course,
+    and keeps the user's overall total (UserScoreSummary), the course's score
+    histogram (ScoreBucket) and this week's and month's best scores (PeriodScore) in step with it.
+    Returns a ScoreResult.
+    """
+    taken_at = achieved_at or timezone.now()
+    achieved_at = connection.ops.adapt_datetimefield_value(taken_at)
+
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            score_id, highest_score, previous_score, created = _upsert(cursor, user_id, course_id, score, achieved_at)
+            _record_period_scores(cursor, user_id, course_id, score, taken_at, achieved_at)
+
+            # previous_score is only missing without `created` if another request created the
+            # row at the very same moment; then all we know is whether our score won.
+            raced = previous_score is None and not created
+            changed = created or (highest_score == score if raced else highest_score > previous_score)
+
+            if changed and raced:
+                # We don't know what the other request added, so count this user's total
+                # and the course's histogram again.
+                UserScoreSummary.refresh_for_user(user_id)
+                ScoreBucket.rebuild_for_course(course_id)
+            elif changed:
+                _add_to_summary(cursor, user_id, highest_score - (previous_score or 0), int(created), achieved_at)
+                _move_in_histogram(cursor, course_id, previous_score, highest_score)
+
+        if created:
+            Course.objects.filter(pk=course_id).update(scorer_count=F('scorer_count') + 1)
+
+    return ScoreResult(
+        highest_score=highest_score,
+        previous_score=previous_score,
+        created=created,
+        changed=changed,
+        score_id=score_id,
+    )
+
+
+def submit_quiz_result(user, course_id, score, taken_at=None, duration=None, answers=None):
+    """
+    Everything that happens when a user finishes a quiz: their best score is kept,
+    and once the transaction is saved the attempt goes into their history, the
+    course leaderboard moves and any answers (from answer_stats.clean_answers) are counted.
+    Returns the ScoreResult from record_best_score.
+    """
+    taken_at = taken_at or timezone.now()
+    result = record_best_score(user.pk, course_id, score, achieved_at=taken_at)
+
+    attempt = QuizAttempt(user_id=user.pk, course_id=course_id, score=score, duration_seconds=duration, taken_at=taken_at)
+
+    def after_commit():
+        # The attempt is written in the background together with other attempts.
+        attempt_log.add(attempt)
+        record_answers(answers, score)
+        if result.changed:
+            get_leaderboard_backend().record(course_id, result.score_id, user.pk, user.username, result.highest_score, taken_at)
+            # Anyone watching the live leaderboard gets the new top scores within a couple of seconds.
+            get_leaderboard_pusher().changed(course_id)
+
+    # Outside a transaction this runs straight away; inside one (e.g. a batch of results)
+    # it waits, so nothing outside the database sees scores that might still be rolled back.
+    transaction.on_commit(after_commit)
+    return result
@@ -0,0 +1,380 @@
+# quiz/scraping.py
+#
+# The engine behind the job and scholarship scrapers. The sites themselves are described in
+# quiz/sources.py; scrape_sources() fetches, reads and saves them, for the background task
+# (quiz/tasks.py) and the scrape_jobs management command.
+#   - HttpClient: one requests.Session for every scraper, so connections to a site are kept
+#     open and reused (keep-alive) instead of a new connection per page. Every request gets
+#     a timeout, and each site gets at most a few requests at the same time, so we stay polite.
+#   - ResponseCache: keeps the pages we downloaded on disk (settings.SCRAPER_CACHE_DIR). Next time
+#     the client asks the site "has this changed?" (If-None-Match / If-Modified-Since) and reuses the
+#     saved page when the answer is "304 Not Modified", so unchanged pages aren't downloaded again.
+#   - run_in_parallel: runs the scrapers at the same time in a thread pool. They only fetch and
+#     read pages there; saving to the database happens afterwards on the calling thread.
+#   - read_listing / read_detail: turn a downloaded page into posts. They parse with lxml and only
+#     the parts of the page a source needs, and free each page's tree as soon as it has been read.
+#   - save_posts: writes one page of posts with one bulk upsert, skipping posts that haven't changed.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+
+import requests
+from bs4 import BeautifulSoup
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from urllib3.util.retry import Retry
+
+
+DEFAULT_TIMEOUT = 10 # seconds to connect and to wait for data
+PER_HOST_LIMIT = 4   # requests to the same site at the same time
+POOL_SIZE = 16       # open connections kept per site
+CACHE_KEEP_SECONDS = 30 * 24 * 3600 # cached pages nobody asked for in this long are deleted
+PARSER = 'lxml'      # much faster than Python's own 'html.parser'
+
+
+class ResponseCache:
+    """
+    Saved pages on disk, two files per URL (named after a hash of it):
+        <hash>.body  the page itself
+        <hash>.json  the URL, its ETag / Last-Modified headers, its encoding and when we last checked it
+    Several threads can use it at once: files are written under a temporary name and then renamed.
+    """
+
+    def __init__(self, directory):
+        self.directory = str(directory)
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, url, extension):
+        name = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{name}.{extension}')
+
+    def _write(self, path, data):
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(temp_path, path)
+
+    def get(self, url):
+        # Returns (info, body) or None if we don't have the page.
+        try:
+            with open(self._path(url, 'json'), 'rb') as f:
+                info = json.load(f)
+            with open(self._path(url, 'body'), 'rb') as f:
+                body = f.read()
+        except (OSError, ValueError):
+            return None
+        if info.get('url') != url:
+            return None
+        return info, body
+
+    def store(self, url, response):
+        info = {
+            'url': url,
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'encoding': response.encoding,
+            'checked_at': time.time(),
+        }
+        # The body goes first, so the .json file never points at a page that isn't there yet.
+        self._write(self._path(url, 'body'), response.content)
+        self._write(self._path(url, 'json'), json.dumps(info).encode('utf-8'))
+
+    def touch(self, url, info):
+        # The site said the page hasn't changed: remember when we last checked.
+        info['checked_at'] = time.time()
+        self._write(self._path(url, 'json'), json.dumps(info).encode('utf-8'))
+
+    def prune(self, older_than=CACHE_KEEP_SECONDS):
+        # Deletes pages that haven't been checked for a long time (e.g. posts that left the listing).
+        cutoff = time.time() - older_than
+        removed = 0
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith('.json') and entry.stat().st_mtime < cutoff:
+                for path in (entry.path, entry.path[:-len('.json')] + '.body'):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                removed += 1
+        return removed
+
+
+def default_cache():
+    # The cache in settings.SCRAPER_CACHE_DIR, or None if caching is switched off.
+    directory = getattr(settings, 'SCRAPER_CACHE_DIR', None)
+    return ResponseCache(directory) if directory else None
+
+
+def _cached_response(url, info, body):
+    # Turns a saved page back into a requests.Response, so scrapers can't tell the difference.
+    response = requests.Response()
+    response.status_code = 200
+    response.url = url
+    response._content = body
+    response.encoding = info.get('encoding')
+    response.headers = CaseInsensitiveDict()
+    if info.get('etag'):
+        response.headers['ETag'] = info['etag']
+    if info.get('last_modified'):
+        response.headers['Last-Modified'] = info['last_modified']
+    response.from_cache = True
+    return response
+
+
+class HttpClient:
+    """
+    A requests.Session with pooled keep-alive connections, a default timeout,
+    a couple of retries for flaky servers, and a limit on requests per host.
+    Pass a ResponseCache to skip downloading pages that haven't changed.
+    Use it as a context manager so the connections are closed at the end:
+
+        with HttpClient() as client:
+            page = client.get('https://example.com/jobs/')
+    """
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, per_host=PER_HOST_LIMIT, pool_size=POOL_SIZE, cache=None):
+        self.timeout = timeout
+        self.per_host = per_host
+        self.cache = cache
+        self.stats = {'downloaded': 0, 'not_modified': 0, 'fresh': 0} # how each page was got
+
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = 'Mozilla/5.0 (compatible; MyUniStudyApp scraper)'
+        retries = Retry(total=2, backoff_factor=0.5, status_forcelist=[429, 502, 503, 504], allowed_methods=['GET'])
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retries)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._host_limits = defaultdict(lambda: threading.BoundedSemaphore(self.per_host))
+        self._lock = threading.Lock()
+
+    def _limit_for(self, url):
+        with self._lock:
+            return self._host_limits[urlsplit(url).netloc]
+
+    def _count(self, how):
+        with self._lock:
+            self.stats[how] += 1
+
+    def get(self, url, max_age=None, **kwargs):
+        """
+        Like requests.get, but pooled, limited per host and always with a timeout.
+        With a cache, a page checked less than `max_age` seconds ago is used without asking the
+        site at all; otherwise the site is asked whether it changed and the saved page is used on a 304.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        cached = self.cache.get(url) if self.cache else None
+        if cached:
+            info, body = cached
+            if max_age is not None and time.time() - info.get('checked_at', 0) < max_age:
+                self._count('fresh')
+                return _cached_response(url, info, body)
+            headers = dict(kwargs.pop('headers', None) or {})
+            if info.get('etag'):
+                headers['If-None-Match'] = info['etag']
+            if info.get('last_modified'):
+                headers['If-Modified-Since'] = info['last_modified']
+            kwargs['headers'] = headers
+
+        with self._limit_for(url):
+            response = self.session.get(url, **kwargs)
+
+        if cached and response.status_code == 304:
+            self.cache.touch(url, info)
+            self._count('not_modified')
+            return _cached_response(url, info, body)
+
+        response.raise_for_status()
+        self._count('downloaded')
+        if self.cache:
+            self.cache.store(url, response)
+        return response
+
+    def get_many(self, urls, max_age=None):
+        """
+        Fetches several pages at the same time. Returns {url: response}, leaving out
+        pages that failed (their errors are printed).
+        """
+        pages = {}
+        if not urls:
+            return pages
+        with ThreadPoolExecutor(max_workers=min(len(urls), self.per_host)) as pool:
+            futures = {pool.submit(self.get, url, max_age): url for url in urls}
+            for future in as_completed(futures):
+                try:
+                    pages[futures[future]] = future.result()
+                except requests.RequestException as e:
+                    print(f"[ERROR] Could not fetch {futures[future]}: {e}")
+        return pages
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def run_in_parallel(jobs, max_workers=8):
+    """
+    Runs {name: function} at the same time and yields (name, result, error, seconds)
+    as each one finishes. error is None if the function worked.
+    """
+    def timed(function):
+        started = time.perf_counter()
+        return function(), time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=max(1, min(len(jobs), max_workers))) as pool:
+        futures = {pool.submit(timed, function): name for name, function in jobs.items()}
+        for future in as_completed(futures):
+            try:
+                result, seconds = future.result()
+                yield futures[future], result, None, seconds
+            except Exception as e:
+                yield futures[future], None, e, None
+
+
+def _parse(content, strainer, fast):
+    # fast=False is the old way (the whole page with html.parser); bench_scrape_parsing compares them.
+    if fast:
+        return BeautifulSoup(content, PARSER, parse_only=strainer)
+    return BeautifulSoup(content, 'html.parser')
+
+
+def read_listing(source, content, fast=True):
+    # The posts on a listing page (bytes), with the fields found there.
+    soup = _parse(content, source.strainer, fast)
+    try:
+        posts = []
+        for item in source.select_items(soup):
+            post = source.read(item, source.fields, source.new_post())
+            if post.get('link'):
+                posts.append(post)
+        return posts
+    finally:
+        # The values read are plain strings, so the tree can go now instead of whenever
+        # the garbage collector gets round to its reference cycles.
+        soup.decompose()
+
+
+def read_detail(source, content, post, fast=True):
+    # Adds the detail_fields found on a post's own page to the post.
+    soup = _parse(content, source.detail_strainer, fast)
+    try:
+        return source.read(soup, source.detail_fields, post)
+    finally:
+        soup.decompose()
+
+
+def scrape_source(client, source):
+    """
+    Fetches and reads one source's listing page (and its posts' own pages if it has
+    detail_fields). Returns a list of post dicts ready for save_posts. Doesn't touch the database.
+    """
+    posts = read_listing(source, client.get(source.url).content)
+
+    if source.detail_fields and posts:
+        # The post pages are fetched at the same time instead of one after another. A post's page
+        # rarely changes once it is up, so one we already have is reused for SCRAPER_DETAIL_MAX_AGE.
+        max_age = getattr(settings, 'SCRAPER_DETAIL_MAX_AGE', 24 * 3600)
+        pages = client.get_many([post['link'] for post in posts], max_age=max_age)
+        # A post whose page couldn't be downloaded is left out of this run (get_many printed why).
+        # Saving it with the 'No summary' / 'Unknown date' placeholders would overwrite the real
+        # summary and date we may already have; the next run tries it again.
+        complete = []
+        for post in posts:
+            page = pages.pop(post['link'], None)
+            if page is not None:
+                complete.append(read_detail(source, page.content, post))
+        posts = complete
+
+    return posts
+
+
+def post_hash(post):
+    # The fingerprint stored in content_hash: it changes whenever what we show for the post changes.
+    parts = [post.get(field) or '' for field in ('title', 'summary', 'date_posted', 'image_url')]
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+
+def save_posts(model, posts):
+    """
+    Saves one page of scraped posts with one query to read what we have and one to write.
+    Posts whose content_hash matches the saved row are left alone.
+    Runs on the calling thread, so the scraper threads never touch the database.
+    Returns (inserted, updated, unchanged).
+    """
+    # A page can list the same post twice; the database can only upsert each link once per query.
+    by_link = {}
+    for post in posts:
+        by_link[post['link']] = dict(post, content_hash=post_hash(post))
+
+    saved = dict(model.objects.filter(link__in=by_link).values_list('link', 'content_hash'))
+    changed = [post for link, post in by_link.items() if saved.get(link) != post['content_hash']]
+    inserted = sum(1 for post in changed if post['link'] not in saved)
+
+    if changed:
+        update_fields = ['title', 'summary', 'date_posted', 'image_url', 'source', 'content_hash']
+        # e.g. ScholarshipPost.updated_at
+        update_fields += [f.name for f in model._meta.concrete_fields if getattr(f, 'auto_now', False)]
+        model.objects.bulk_create(
+            [model(**post) for post in changed],
+            update_conflicts=True,
+            unique_fields=['link'],
+            update_fields=update_fields,
+        )
+
+    return inserted, len(changed) - inserted, len(by_link) - len(changed)
+
+
+def scrape_sources(sources, log=print):
+    """
+    Scrapes the given sources (see quiz/sources.py) at the same time, sharing one pool of
+    connections and the on-disk page cache, and saves what they find one source at a time.
+    Progress goes to `log`. Returns the totals: {'inserted', 'updated', 'unchanged', 'failed'}.
+    """
+    started = time.perf_counter()
+    totals = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+    by_name = {source.name: source for source in sources}
+
+    cache = default_cache()
+    with HttpClient(cache=cache) as client:
+        jobs = {source.name: (lambda source=source: scrape_source(client, source)) for source in sources}
+        for name, posts, error, seconds in run_in_parallel(jobs):
+            if error is not None:
+                totals['failed'] += 1
+                log(f"[ERROR] {name} scraping failed: {error}")
+                continue
+            if not posts:
+                log(f"[WARNING] {name}: no posts found. Check its selectors in quiz/sources.py.")
+                continue
+            try:
+                inserted, updated, unchanged = save_posts(by_name[name].model, posts)
+            except Exception as e:
+                # e.g. a link or title too long for its column. The other sites are still saved.
+                totals['failed'] += 1
+                log(f"[ERROR] {name} posts could not be saved: {e}")
+                continue
+            totals['inserted'] += inserted
+            totals['updated'] += updated
+            totals['unchanged'] += unchanged
+            log(f"{name}: {len(posts)} posts in {seconds:.1f}s "
+                f"({inserted} new, {updated} updated, {unchanged} unchanged)")
+
+    log(f"Posts saved: {totals['inserted']} new, {totals['updated']} updated, {totals['unchanged']} unchanged")
+    log(f"Pages downloaded: {client.stats['downloaded']}, unchanged: {client.stats['not_modified']}, "
+        f"reused without asking: {client.stats['fresh']}")
+    if cache:
+        cache.prune()
+    log(f"Scraping finished in {time.perf_counter() - started:.1f}s.")
+    return totals
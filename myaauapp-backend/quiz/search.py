@@ -0,0 +1,160 @@
+# quiz/search.py
+#
+# Full-text search over question text and options.
+# The search index lives in the database and the database keeps it up to date:
+#   - PostgreSQL: a tsvector column (search_vector) that PostgreSQL recomputes itself
+#     whenever a question row is written, with a GIN index on it.
+#   - SQLite (local testing): an FTS5 table (quiz_question_fts) kept in sync by triggers.
+# Both are created by migration 0016. Any other database falls back to a plain icontains search.
+#
+# Note for SQLite: if a future migration makes Django rebuild the quiz_question table,
+# the triggers go with it. Run install_sqlite_search_index() again in that migration.
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Question
+
+
+SEARCH_FIELDS = ['question_text', 'option_a', 'option_b', 'option_c', 'option_d']
+
+
+POSTGRES_INSTALL_SQL = [
+    # The question text counts more ('A') than the options ('B') when ranking.
+    """
+    ALTER TABLE quiz_question ADD COLUMN IF NOT EXISTS search_vector tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(question_text, '')), 'A') ||
+        setweight(to_tsvector('english',
+            coalesce(option_a, '') || ' ' || coalesce(option_b, '') || ' ' ||
+            coalesce(option_c, '') || ' ' || coalesce(option_d, '')), 'B')
+    ) STORED
+    """,
+    'CREATE INDEX IF NOT EXISTS quiz_question_search_idx ON quiz_question USING GIN (search_vector)',
+]
+
+POSTGRES_UNINSTALL_SQL = [
+    'DROP INDEX IF EXISTS quiz_question_search_idx',
+    'ALTER TABLE quiz_question DROP COLUMN IF EXISTS search_vector',
+]
+
+SQLITE_INSTALL_SQL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS quiz_question_fts USING fts5(
+        question_text, option_a, option_b, option_c, option_d,
+        content='quiz_question', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quiz_question_fts_insert AFTER INSERT ON quiz_question BEGIN
+        INSERT INTO quiz_question_fts (rowid, question_text, option_a, option_b, option_c, option_d)
+        VALUES (new.id, new.question_text, new.option_a, new.option_b, new.option_c, new.option_d);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quiz_question_fts_delete AFTER DELETE ON quiz_question BEGIN
+        INSERT INTO quiz_question_fts (quiz_question_fts, rowid, question_text, option_a, option_b, option_c, option_d)
+        VALUES ('delete', old.id, old.question_text, old.option_a, old.option_b, old.option_c, old.option_d);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS quiz_question_fts_update AFTER UPDATE ON quiz_question BEGIN
+        INSERT INTO quiz_question_fts (quiz_question_fts, rowid, question_text, option_a, option_b, option_c, option_d)
+        VALUES ('delete', old.id, old.question_text, old.option_a, old.option_b, old.option_c, old.option_d);
+        INSERT INTO quiz_question_fts (rowid, question_text, option_a, option_b, option_c, option_d)
+        VALUES (new.id, new.question_text, new.option_a, new.option_b, new.option_c, new.option_d);
+    END
+    """,
+    # Index the questions that are already there.
+    "INSERT INTO quiz_question_fts (quiz_question_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL_SQL = [
+    'DROP TRIGGER IF EXISTS quiz_question_fts_insert',
+    'DROP TRIGGER IF EXISTS quiz_question_fts_delete',
+    'DROP TRIGGER IF EXISTS quiz_question_fts_update',
+    'DROP TABLE IF EXISTS quiz_question_fts',
+]
+
+
+def _run(statements, using_connection):
+    with using_connection.cursor() as cursor:
+        for statement in statements:
+            cursor.execute(statement)
+
+
+def install_search_index(using_connection):
+    if using_connection.vendor == 'postgresql':
+        _run(POSTGRES_INSTALL_SQL, using_connection)
+    elif using_connection.vendor == 'sqlite':
+        install_sqlite_search_index(using_connection)
+
+
+def install_sqlite_search_index(using_connection):
+    _run(SQLITE_INSTALL_SQL, using_connection)
+
+
+def uninstall_search_index(using_connection):
+    if using_connection.vendor == 'postgresql':
+        _run(POSTGRES_UNINSTALL_SQL, using_connection)
+    elif using_connection.vendor == 'sqlite':
+        _run(SQLITE_UNINSTALL_SQL, using_connection)
+
+
+def _fts5_query(text):
+    # Every word has to appear; quoting stops words like AND/NOT/* being read as FTS syntax.
+    # The last word also matches as a prefix, so "osmo" finds "osmosis" while the user is typing.
+    words = [word.replace('"', '""') for word in text.split()]
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    return ' '.join(terms)
+
+
+def _ranked_ids(text, course_id, limit):
+    # Returns matching question ids, best match first.
+    course_filter = 'AND q.course_id = %s' if course_id else ''
+    params = [course_id] if course_id else []
+
+    if connection.vendor == 'postgresql':
+        sql = f"""
+            SELECT q.id FROM quiz_question q, websearch_to_tsquery('english', %s) tsq
+            WHERE q.search_vector @@ tsq {course_filter}
+            ORDER BY ts_rank(q.search_vector, tsq) DESC, q.id
+            LIMIT %s
+        """
+        params = [text, *params, limit]
+    else:
+        # bm25() gives smaller numbers to better matches; the question text is weighted above the options.
+        sql = f"""
+            SELECT q.id FROM quiz_question_fts f JOIN quiz_question q ON q.id = f.rowid
+            WHERE quiz_question_fts MATCH %s {course_filter}
+            ORDER BY bm25(quiz_question_fts, 10.0, 2.0, 2.0, 2.0, 2.0), q.id
+            LIMIT %s
+        """
+        params = [_fts5_query(text), *params, limit]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_questions(text, course_id=None, limit=20):
+    """
+    Returns up to `limit` questions matching `text`, best match first.
+    """
+    if not text.split():
+        return []
+
+    if connection.vendor not in ('postgresql', 'sqlite'):
+        # No search index on this database, so we do the slow search.
+        match = Q()
+        for field in SEARCH_FIELDS:
+            match |= Q(**{f'{field}__icontains': text})
+        questions = Question.objects.select_related('course').filter(match)
+        if course_id:
+            questions = questions.filter(course_id=course_id)
+        return list(questions.order_by('pk')[:limit])
+
+    ids = _ranked_ids(text, course_id, limit)
+    questions = Question.objects.select_related('course').in_bulk(ids)
+    return [questions[pk] for pk in ids if pk in questions]
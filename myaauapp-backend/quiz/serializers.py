@@ -1,5 +1,11 @@
 from rest_framework import serializers
-from .models import Question, JobPost, QuizScore, ScholarshipPost
+from .models import Course, Question, JobPost, QuizAttempt, ScholarshipPost, UserScoreSummary
+
+class CourseSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Course
+        fields = ['code', 'title', 'question_count', 'scorer_count', 'question_bank_version']
+
 
 class QuestionSerializer(serializers.ModelSerializer):
     options = serializers.SerializerMethodField()
@@ -16,23 +22,55 @@ class QuestionSerializer(serializers.ModelSerializer):
             "D": obj.option_d,
         }
     
+class QuestionSearchResultSerializer(QuestionSerializer):
+    # Search can return questions from any course, so we say which one each belongs to.
+    course_code = serializers.CharField(source='course.code', read_only=True)
+
+    class Meta(QuestionSerializer.Meta):
+        fields = ['id', 'course_code', 'question_text', 'correct_answer', 'options']
+
 class JobPostSerializer(serializers.ModelSerializer):
         class Meta:
             model = JobPost
-            fields = '__all__'
+            # Every field except content_hash, which is only used by the scraper (see quiz/scraping.py)
+            exclude = ['content_hash']
+
+class LeaderboardEntrySerializer(serializers.Serializer):
+     # Serializes the LeaderboardEntry rows that the leaderboard backends return (see quiz/leaderboards.py).
+     # They don't carry the course, so the view passes course_code in the context.
+     rank = serializers.IntegerField(read_only=True)
+     id = serializers.IntegerField(read_only=True)
+     user = serializers.CharField(read_only=True)
+     course_code = serializers.SerializerMethodField()
+     highest_score = serializers.IntegerField(read_only=True)
+     achieved_at = serializers.DateTimeField(read_only=True)
+
+     def get_course_code(self, obj):
+          return self.context.get('course_code')
+     
+
+
 
-class QuizScoreSerializer(serializers.ModelSerializer):
+
+
+class OverallLeaderboardEntrySerializer(serializers.ModelSerializer):
+     # One user's place on the leaderboard across all courses.
+     rank = serializers.IntegerField(read_only=True)
      user = serializers.CharField(source='user.username', read_only=True)
-     course_code = serializers.CharField(source='course.code', read_only=True)
 
      class Meta:
-          model = QuizScore
-          fields = ['id', 'user', 'course_code', 'highest_score']
-          read_only_fields = ['user', 'course_code'] 
-     
+          model = UserScoreSummary
+          fields = ['rank', 'user', 'total_score', 'courses_taken', 'average_score', 'achieved_at']
 
 
 
+class QuizAttemptSerializer(serializers.ModelSerializer):
+     course_code = serializers.CharField(source='course.code', read_only=True)
+
+     class Meta:
+          model = QuizAttempt
+          fields = ['id', 'course_code', 'score', 'duration_seconds', 'taken_at']
+
 
 
 class ScholarshipPostSerializer(serializers.ModelSerializer):
@@ -55,7 +93,9 @@ class ScholarshipPostSerializer(serializers.ModelSerializer):
         # '__all__' means include ALL fields from the ScholarshipPost model.
         # You could also list them specifically like:
         # fields = ['id', 'title', 'link', 'summary', 'date_posted', 'image_url', 'source']
-        fields = '__all__'
+        # Here we use exclude instead: everything except content_hash, which only the
+        # scraper uses to spot posts that haven't changed (see quiz/scraping.py).
+        exclude = ['content_hash']
 
         # What is read_only_fields?
         # These are fields that the frontend can read (see), but cannot change
@@ -0,0 +1,220 @@
+# quiz/sources.py
+#
+# Every site we scrape jobs and scholarships from, in one place.
+# A source says where its listing page is, how to find each post on it (CSS selectors),
+# whether each post's own page has to be opened for more details, and which model the posts
+# are saved to. The engine in quiz/scraping.py (scrape_sources) does the rest, for the background
+# task (quiz/tasks.py) and the scrape_jobs management command alike.
+#
+# To add a site, add a Source to SOURCES below. For example:
+#
+#     Source(
+#         name='MySite',
+#         url='https://mysite.com/jobs/',
+#         model=JobPost,
+#         items='article.job',                        # one match per post on the listing page
+#         fields={
+#             'link': Field('h2 a', attr='href'),
+#             'title': Field('h2 a'),                   # no attr means the tag's text
+#             'image_url': Field('img', attr='src'),
+#         },
+#     )
+#
+# Pages are read quickly by only building the parts we need: when `items` is a plain selector
+# like 'article' or 'div.some-class', everything else on the page (menus, sidebars, scripts)
+# is skipped while parsing (see strainer_for). Other selectors still work; the whole page is
+# parsed for them.
+
+import re
+
+import soupsieve
+from bs4 import SoupStrainer
+
+from .models import JobPost, ScholarshipPost
+
+
+# Used for any field a source doesn't have, or that is missing from a post.
+DEFAULTS = {
+    'title': 'No title',
+    'summary': 'No summary',
+    'date_posted': 'Unknown date',
+    'image_url': '',
+}
+
+
+# 'tag', '.class' or 'tag.class': selectors simple enough to be checked while the page is parsed.
+SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?(?:\.([\w-]+))?$')
+
+
+def strainer_for(selectors):
+    """
+    A SoupStrainer that keeps only the tags matching any of the selectors (and everything inside
+    them), or None if a selector isn't simple enough, in which case the whole page is parsed.
+    It may keep a few extra tags (e.g. 'article' and 'div.x' keep every div); the selectors
+    are applied again afterwards, so that only costs a little time.
+    """
+    if not selectors:
+        return None
+    names, classes = set(), set()
+    any_name = any_class = False
+    for selector in selectors:
+        match = SIMPLE_SELECTOR.match(selector or '')
+        if not selector or not match:
+            return None
+        name, class_name = match.groups()
+        if name:
+            names.add(name.lower())
+        else:
+            any_name = True
+        if class_name:
+            classes.add(class_name)
+        else:
+            any_class = True
+
+    if any_name and any_class:
+        return None
+    kwargs = {}
+    if not any_name:
+        kwargs['name'] = sorted(names)
+    if not any_class:
+        # While parsing, class is still the raw string (e.g. "elementor-post type-post"),
+        # so look for the class as a whole word in it.
+        kwargs['class_'] = [re.compile(r'(?:^|\s)' + re.escape(c) + r'(?:\s|$)') for c in sorted(classes)]
+    return SoupStrainer(**kwargs)
+
+
+class Field:
+    """
+    How to read one value from a post: the first tag matching `selector` (or the post's own
+    tag if there is no selector), then its `attr` attribute or, without one, its text.
+    `limit` cuts long text (e.g. a summary taken from a whole article).
+    """
+
+    def __init__(self, selector=None, attr=None, limit=None):
+        self.selector = selector
+        self.attr = attr
+        self.limit = limit
+        self._compiled = soupsieve.compile(selector) if selector else None
+
+    def read(self, node):
+        if self._compiled:
+            node = self._compiled.select_one(node)
+            if node is None:
+                return None
+        if self.attr:
+            value = node.get(self.attr)
+            if isinstance(value, list): # e.g. class="a b"
+                value = ' '.join(value)
+            value = (value or '').strip()
+        else:
+            value = node.get_text(strip=True)
+        if self.limit:
+            value = value[:self.limit]
+        return value or None
+
+
+class Source:
+    """
+    One site. `fields` are read from each `items` match on the listing page; if `detail_fields`
+    is given, each post's own page (its link) is opened too and those fields are read from it.
+    `defaults` overrides DEFAULTS for this site.
+    """
+
+    def __init__(self, name, url, model, items, fields, detail_fields=None, defaults=None):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.items = items
+        self.fields = fields
+        self.detail_fields = detail_fields or {}
+        self.defaults = dict(DEFAULTS, **(defaults or {}))
+
+        self._items = soupsieve.compile(items)
+        self.strainer = strainer_for([items])
+        self.detail_strainer = strainer_for([f.selector for f in self.detail_fields.values()])
+
+    def select_items(self, soup):
+        return self._items.select(soup)
+
+    def read(self, node, fields, post):
+        # Fills `post` with the fields found in node; missing ones get this site's defaults.
+        for name, field in fields.items():
+            post[name] = field.read(node) or self.defaults.get(name)
+        return post
+
+    def new_post(self):
+        return dict(self.defaults, source=self.name)
+
+    def __repr__(self):
+        return f'<Source {self.name}>'
+
+
+SOURCES = [
+    Source(
+        name='Dixcoverhub',
+        url='https://dixcoverhub.jobuj.com/category/jobs/',
+        model=JobPost,
+        items='article.elementor-post',
+        fields={
+            'link': Field('h3.elementor-post__title a', attr='href'),
+            'title': Field('h3.elementor-post__title a'),
+            'summary': Field('div.elementor-post__excerpt'),
+            'date_posted': Field('span.elementor-post-date'),
+            'image_url': Field('img', attr='src'),
+        },
+    ),
+    Source(
+        name='JobsRegion',
+        url='https://www.jobsregion.com/category/job/',
+        model=JobPost,
+        items='div.td-module-thumb',
+        fields={
+            'link': Field('a[href][title]', attr='href'),
+            'title': Field('a[href][title]', attr='title'),
+            'image_url': Field('a[href][title] span.entry-thumb', attr='data-img-url'),
+        },
+        # The date and summary are only on each post's own page.
+        detail_fields={
+            'date_posted': Field('time.entry-date'),
+            'summary': Field('div.td-post-content', limit=300),
+        },
+    ),
+    Source(
+        name='DeRoundTable',
+        url='https://deroundtable.com/category/jobs-vacancies/',
+        model=JobPost,
+        items='article',
+        fields={
+            'link': Field('h2.entry-title a', attr='href'),
+            'title': Field('h2.entry-title a'),
+            'summary': Field('div.entry-excerpt'),
+            'date_posted': Field('li.meta-date'),
+            # no clear image in listing
+        },
+    ),
+    #For scholarships
+    Source(
+        name='SmartyAcad',
+        url='https://jobs.smartyacad.com/category/scholarship/',
+        model=ScholarshipPost,
+        items='div.elementor-post__card',
+        fields={
+            'link': Field('h3.elementor-post__title a', attr='href'),
+            'title': Field('h3.elementor-post__title a'),
+            'date_posted': Field('span.elementor-post-date'),
+            'image_url': Field('img', attr='src'),
+        },
+        defaults={'summary': 'No summary provided in listing'},
+    ),
+]
+
+
+def get_sources(names=None):
+    # All sources, or only the named ones (names are matched without caring about case).
+    if not names:
+        return list(SOURCES)
+    by_name = {source.name.lower(): source for source in SOURCES}
+    unknown = [name for name in names if name.lower() not in by_name]
+    if unknown:
+        raise ValueError(f"Unknown source(s): {', '.join(unknown)}. Known: {', '.join(s.name for s in SOURCES)}.")
+    return [by_name[name.lower()] for name in names]
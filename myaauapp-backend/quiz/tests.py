@@ -1,3 +1,176 @@
-from django.test import TestCase
+from datetime import timedelta
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from .models import Course, Question, QuestionTombstone, QuizScore, ScoreBucket, UserScoreSummary
+from .scores import record_best_score
+
+
+class RecordBestScoreTests(TestCase):
+    # record_best_score uses hand-written SQL for PostgreSQL and SQLite,
+    # so these run against whichever database the tests are set up with.
+
+    def setUp(self):
+        self.user = User.objects.create_user('student', password='x')
+        self.course = Course.objects.create(code='GST101', title='Use of English')
+
+    def record(self, score):
+        return record_best_score(self.user.pk, self.course.pk, score)
+
+    def assert_totals(self, total, bucket_score):
+        summary = UserScoreSummary.objects.get(user=self.user)
+        self.assertEqual(summary.total_score, total)
+        self.assertEqual(summary.courses_taken, 1)
+        buckets = dict(ScoreBucket.objects.filter(course=self.course, count__gt=0).values_list('score', 'count'))
+        self.assertEqual(buckets, {bucket_score: 1})
+        self.course.refresh_from_db()
+        self.assertEqual(self.course.scorer_count, 1)
+
+    def test_first_score_creates_the_row(self):
+        result = self.record(7)
+        self.assertEqual(result, (7, None, True, True, QuizScore.objects.get().pk))
+        self.assert_totals(7, 7)
+
+    def test_higher_score_replaces_the_best(self):
+        first = self.record(7)
+        result = self.record(9)
+        self.assertEqual(result, (9, 7, False, True, first.score_id))
+        self.assertEqual(QuizScore.objects.get().highest_score, 9)
+        self.assert_totals(9, 9)
+
+    def test_equal_score_changes_nothing(self):
+        self.record(9)
+        achieved_at = QuizScore.objects.get().achieved_at
+        result = self.record(9)
+        self.assertEqual((result.highest_score, result.previous_score, result.created, result.changed), (9, 9, False, False))
+        self.assertEqual(QuizScore.objects.get().achieved_at, achieved_at)
+        self.assert_totals(9, 9)
+
+    def test_lower_score_keeps_the_best(self):
+        self.record(9)
+        result = self.record(4)
+        self.assertEqual((result.highest_score, result.previous_score, result.created, result.changed), (9, 9, False, False))
+        self.assertEqual(QuizScore.objects.get().highest_score, 9)
+        self.assert_totals(9, 9)
+
+
+class QuestionSampleSeedTests(TestCase):
+    # ?n=...&seed=... picks a repeatable random set; the seed is sent back in a header.
+
+    def setUp(self):
+        course = Course.objects.create(code='GST101', title='Use of English')
+        for i in range(5):
+            Question.objects.create(
+                course=course, question_text=f'Question {i}',
+                option_a='a', option_b='b', option_c='c', option_d='d', correct_answer='A',
+            )
+
+    def sample(self, seed):
+        return self.client.get('/api/quiz/questions/GST101/', {'n': 3, 'seed': seed})
+
+    def test_good_seed_is_sent_back(self):
+        response = self.sample('abc-_1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-Quiz-Seed'], 'abc-_1')
+        self.assertNotIn('abc-_1', response['ETag'])
+
+    def test_bad_seeds_are_rejected(self):
+        for seed in ['abc\n', 'a\nb', 'a"b', 'x' * 65]:
+            with self.subTest(seed=seed):
+                self.assertEqual(self.sample(seed).status_code, 400)
+
+
+class QuestionMoveTests(TestCase):
+    # Moving a question to another course (e.g. in the admin) changes both courses.
+
+    def setUp(self):
+        self.old = Course.objects.create(code='GST101', title='Use of English')
+        self.new = Course.objects.create(code='PHY101', title='Physics')
+        self.question = Question.objects.create(
+            course=self.old, question_text='Which one?',
+            option_a='a', option_b='b', option_c='c', option_d='d', correct_answer='A',
+        )
+
+    def move(self, course):
+        self.question.course = course
+        self.question.save()
+        self.old.refresh_from_db()
+        self.new.refresh_from_db()
+
+    def test_both_question_banks_get_a_new_version(self):
+        old_version, new_version = self.old.question_bank_version, self.new.question_bank_version
+        self.move(self.new)
+        self.assertGreater(self.old.question_bank_version, old_version)
+        self.assertGreater(self.new.question_bank_version, new_version)
+        self.assertEqual(self.question.revision, self.new.question_bank_version)
+
+    def test_old_course_gets_a_tombstone(self):
+        self.move(self.new)
+        tombstones = QuestionTombstone.objects.filter(course=self.old).values_list('question_id', 'revision')
+        self.assertEqual(list(tombstones), [(self.question.pk, self.old.question_bank_version)])
+
+    def test_moving_back_drops_the_tombstone(self):
+        self.move(self.new)
+        self.move(self.old)
+        self.assertFalse(QuestionTombstone.objects.filter(course=self.old).exists())
+        self.assertTrue(QuestionTombstone.objects.filter(course=self.new, question_id=self.question.pk).exists())
+
+    def test_question_count_moves_with_the_question(self):
+        self.move(self.new)
+        self.assertEqual((self.old.question_count, self.new.question_count), (0, 1))
+        self.question.delete()
+        self.new.refresh_from_db()
+        self.assertEqual(self.new.question_count, 0)
+
+    def test_question_count_never_goes_below_zero(self):
+        # e.g. after loaddata, which doesn't count questions, without refresh_course_counts
+        Course.objects.filter(pk=self.old.pk).update(question_count=0)
+        self.question.delete()
+        self.old.refresh_from_db()
+        self.assertEqual(self.old.question_count, 0)
+
+
+class QuizAttemptListTests(TestCase):
+    # ?since=...&until=... must be real dates and times; anything else is a 400, not a 500.
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('student', password='x'))
+
+    def test_bad_dates_are_rejected(self):
+        for value in ['yesterday', '2025-13-01T00:00:00', '2025-02-30T00:00:00']:
+            for param in ['since', 'until']:
+                with self.subTest(param=param, value=value):
+                    response = self.client.get('/api/quiz/attempts/', {param: value})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn(param, response.json())
+
+    def test_good_date_is_accepted(self):
+        response = self.client.get('/api/quiz/attempts/', {'since': '2025-01-31T00:00:00Z'})
+        self.assertEqual(response.status_code, 200)
+
+
+@override_settings(QUIZ_MAX_OFFLINE_DAYS=3)
+class SubmitQuizResultsBatchTests(TestCase):
+    # Quizzes taken offline keep their own time, but only if it is recent.
+
+    def setUp(self):
+        self.client.force_login(User.objects.create_user('student', password='x'))
+        Course.objects.create(code='GST101', title='Use of English')
+
+    def submit(self, taken_at):
+        item = {'course_code': 'GST101', 'score': 8, 'taken_at': taken_at.isoformat()}
+        response = self.client.post('/api/quiz/submit-quiz-results/batch/', [item], content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results'][0]
+
+    def test_recent_time_is_kept(self):
+        taken_at = timezone.now() - timedelta(days=2)
+        self.assertEqual(self.submit(taken_at)['status'], 'created')
+        self.assertEqual(QuizScore.objects.get().achieved_at, taken_at)
+
+    def test_old_time_is_refused(self):
+        result = self.submit(timezone.now() - timedelta(days=4))
+        self.assertEqual(result['status'], 'error')
+        self.assertFalse(QuizScore.objects.exists())
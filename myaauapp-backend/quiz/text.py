@@ -0,0 +1,43 @@
+# quiz/text.py
+#
+# Small text helpers shared by the quiz models and management commands.
+
+import hashlib
+import re
+import unicodedata
+
+
+def clean_text(text):
+    """
+    Turns text copied from PDFs and Word documents into plain ASCII text.
+    This is what the clean_data command writes back to the database.
+    """
+    # We normalize the text to remove all non-standard characters.
+    new_text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode('utf-8')
+
+    # We also need to get rid of any stray hyphens or newlines that might be left.
+    new_text = new_text.replace('\n', ' ').replace('\r', '').replace('\t', '')
+
+    # We also clean up any double spaces or hyphens that might have been created.
+    return new_text.replace('--', '-').replace('  ', ' ')
+
+
+def normalize_course_code(code):
+    # "gst 101", " GST101 " and "Gst101" are all the same course: GST101.
+    return ''.join(code.split()).upper()
+
+
+def normalize_for_hash(text):
+    # Two questions that only differ in case, spacing, accents or repeated hyphens count as the same.
+    # Because this starts from clean_text, running clean_data never changes a question's hash.
+    text = ' '.join(clean_text(text or '').split())
+    return re.sub(r'-+', '-', text).casefold()
+
+
+def question_content_hash(question_text, option_a, option_b, option_c, option_d):
+    """
+    Returns a fingerprint of a question's text and options (64 hex characters).
+    """
+    parts = [question_text, option_a, option_b, option_c, option_d]
+    normalized = '\x1f'.join(normalize_for_hash(part) for part in parts)
+    return hashlib.sha256(normalized.encode('utf-8')).hexdigest()
@@ -1,12 +1,23 @@
 # quiz app urls.py
 from django.urls import path
-from .views import CourseQuestionsView, JobPostListView, SubmitQuizResultView, LeaderboardView, ScholarshipPostListAPIView
+from .views import CourseListView, CourseQuestionsView, JobPostListView, SubmitQuizResultView, SubmitQuizResultsBatchView, LeaderboardView, OverallLeaderboardView, PercentileView, leaderboard_stream, ScholarshipPostListAPIView, QuestionPackView, QuestionPackDeltaView, QuestionSearchView, QuestionStatsView, PracticeView, QuizAttemptListView
 
 urlpatterns= [
+    path('courses/', CourseListView.as_view(), name='course-list'),
     path('questions/<str:course_code>/', CourseQuestionsView.as_view()),
+    path('packs/<str:course_code>/', QuestionPackView.as_view(), name='question-pack'),
+    path('packs/<str:course_code>/delta/', QuestionPackDeltaView.as_view(), name='question-pack-delta'),
+    path('practice/<str:course_code>/', PracticeView.as_view(), name='practice'),
+    path('search/', QuestionSearchView.as_view(), name='question-search'),
+    path('stats/<str:course_code>/', QuestionStatsView.as_view(), name='question-stats'),
     path('jobs/', JobPostListView.as_view()),
     path('submit-quiz-result/', SubmitQuizResultView.as_view(), name='submit-quiz-result'),
+    path('submit-quiz-results/batch/', SubmitQuizResultsBatchView.as_view(), name='submit-quiz-results-batch'),
+    path('attempts/', QuizAttemptListView.as_view(), name='quiz-attempts'),
+    path('leaderboard/', OverallLeaderboardView.as_view(), name='overall-leaderboard'),
     path('leaderboard/<str:course_code>/', LeaderboardView.as_view(), name='leaderboard'),
+    path('leaderboard/<str:course_code>/live/', leaderboard_stream, name='leaderboard-live'),
+    path('percentile/<str:course_code>/', PercentileView.as_view(), name='score-percentile'),
     path('scholarships/', ScholarshipPostListAPIView.as_view(), name='scholarship-list'),
     
 ]
\ No newline at end of file
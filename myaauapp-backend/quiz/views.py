@@ -1,36 +1,269 @@
+import gzip
+import hashlib
+import re
+import secrets
+from datetime import date, timedelta
+
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404
+from django.db import transaction
+from django.core.handlers.asgi import ASGIRequest
+from django.http import HttpResponse, HttpResponseNotModified, JsonResponse, StreamingHttpResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 
 
 
 # Create your views here.
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from .models import Course, Question, JobPost, QuizScore, ScholarshipPost
-from .serializers import QuestionSerializer, JobPostSerializer, QuizScoreSerializer, ScholarshipPostSerializer
+from .models import Course, Question, JobPost, PeriodScore, PracticeState, QuizAttempt, ScholarshipPost, UserScoreSummary
+from .serializers import CourseSerializer, QuestionSerializer, QuestionSearchResultSerializer, JobPostSerializer, LeaderboardEntrySerializer, OverallLeaderboardEntrySerializer, QuizAttemptSerializer, ScholarshipPostSerializer
+from .question_bank import get_question_bank_payload, get_question_ids, question_bank_etag, sample_questions
+from .practice import choose_questions, clean_reviews, drop_removed_questions, in_course, pack_state, review, today, unpack_state
+from .packs import get_question_delta, get_question_pack, pack_etag
+from .search import search_questions
+from .courses import get_course_id
+from .leaderboards import OVERALL_RANKINGS, PeriodLeaderboardBackend, RankedEntries, get_leaderboard_backend, ranked_summaries, score_percentile, summary_rank_of
+from .pagination import AttemptPagination, LeaderboardPagination
+from .scores import submit_quiz_result
+from .live import get_broadcast_hub, leaderboard_channel, leaderboard_snapshot
+from .answer_stats import answers_in_course, clean_answers, question_statistics
+from .text import normalize_course_code
 from rest_framework.pagination import PageNumberPagination
 from rest_framework import status
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework import generics
+from rest_framework.exceptions import ValidationError
+from rest_framework.authtoken.models import Token
+from asgiref.sync import sync_to_async
 
   
 
 
+class CourseListView(APIView):
+    # The list of courses for the app's home screen. The counts are stored on each
+    # course, so this is a single read, and it is fine for a CDN to keep it for a minute.
+    def get(self, request):
+        courses = Course.objects.order_by('code')
+        serializer = CourseSerializer(courses, many=True)
+        response = Response(serializer.data)
+        patch_cache_control(response, public=True, max_age=60)
+        return response
+
+
+
+# What a ?seed= for a random practice set may look like.
+SEED_PATTERN = re.compile(r'[A-Za-z0-9_-]{1,64}')
+
+
 class CourseQuestionsView(APIView):
     def get(self, request, course_code):
         # Look for the course by code e.g GST101/GST102
-        course = get_object_or_404(Course, code=course_code.upper())
+        course = get_object_or_404(
+            Course.objects.only('id', 'code', 'question_bank_version'),
+            code=normalize_course_code(course_code),
+        )
+
+        # A random practice set was asked for, e.g. ?n=20&seed=abc
+        if 'n' in request.query_params:
+            return self.get_sample(request, course)
 
-        #Get all the questions under the course
-        questions = Question.objects.filter(course=course)
+        # If the client already has this version of the question bank, tell it so
+        # and skip sending the questions again.
+        etag = question_bank_etag(course)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+            response['ETag'] = etag
+            return response
 
-        #Serialize them for the frontend
-        serializer = QuestionSerializer(questions, many=True)
+        #Get the serialized questions (built once per version, then served from the cache)
+        payload = get_question_bank_payload(course)
 
         #Send the serialized data questions to the frontend
-        return Response(serializer.data)
+        response = HttpResponse(payload, content_type='application/json')
+        response['ETag'] = etag
+        return response
+
+    def get_sample(self, request, course):
+        # ?n=20 asks for 20 random questions instead of the whole bank.
+        try:
+            n = int(request.query_params['n'])
+        except ValueError:
+            return Response({"detail": "n must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if n < 1:
+            return Response({"detail": "n must be at least 1."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # The seed decides which questions are picked. If the client doesn't send one
+        # we make one up and send it back, so the same attempt can be fetched again.
+        # It is sent back in a header, so only plain letters, digits, - and _ are allowed.
+        seed = request.query_params.get('seed') or str(secrets.randbelow(2 ** 31))
+        if not SEED_PATTERN.fullmatch(seed):
+            return Response({"detail": "seed must be 1 to 64 letters, digits, - or _."}, status=status.HTTP_400_BAD_REQUEST)
+
+        seed_hash = hashlib.sha256(seed.encode('utf-8')).hexdigest()[:16]
+        etag = f'"{course.code}-v{course.question_bank_version}-n{n}-s{seed_hash}"'
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            questions = sample_questions(course, n, seed)
+            response = Response(QuestionSerializer(questions, many=True).data)
+
+        response['ETag'] = etag
+        response['X-Quiz-Seed'] = seed
+        return response
     
     
     
+class PracticeView(APIView):
+    # Spaced-repetition practice for one course (see quiz/practice.py).
+    # GET ?n=10 gives the next questions to practise; POST saves how the user did on them.
+    # Instead of sending the whole question bank, the app only gets what is due.
+    permission_classes = [IsAuthenticated]
+    max_questions = 50
+
+    def get_course(self, course_code):
+        return get_object_or_404(
+            Course.objects.only('id', 'code', 'question_bank_version'),
+            code=normalize_course_code(course_code),
+        )
+
+    def get(self, request, course_code):
+        course = self.get_course(course_code)
+        try:
+            n = min(int(request.query_params.get('n', 10)), self.max_questions)
+        except ValueError:
+            return Response({"detail": "n must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        if n < 1:
+            return Response({"detail": "n must be at least 1."}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 1. Read the user's packed practice records (one row) and the course's question ids (kept in memory)
+        state = PracticeState.objects.filter(user=request.user, course=course).values_list('state', flat=True).first()
+        records = unpack_state(state)
+        question_ids = get_question_ids(course)
+        drop_removed_questions(records, question_ids)
+
+        # 2. Pick the questions and load only those
+        picked, due_count, new_count = choose_questions(records, question_ids, n, today())
+        questions = Question.objects.in_bulk(picked)
+
+        return Response({
+            "course_code": course.code,
+            "due_count": due_count,
+            "new_count": new_count,
+            "questions": QuestionSerializer([questions[pk] for pk in picked if pk in questions], many=True).data,
+        })
+
+    def post(self, request, course_code):
+        course = self.get_course(course_code)
+        try:
+            reviews = clean_reviews(request.data.get('answers'))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        question_ids = get_question_ids(course)
+        unknown = [question_id for question_id, _ in reviews if not in_course(question_ids, question_id)]
+        if unknown:
+            return Response(
+                {"detail": f"These questions are not in {course.code}: {', '.join(map(str, unknown))}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # One read (locking the row, so two devices can't overwrite each other) and one write.
+        day = today()
+        with transaction.atomic():
+            state, _ = PracticeState.objects.select_for_update().get_or_create(user=request.user, course=course)
+            records = unpack_state(state.state)
+            drop_removed_questions(records, question_ids)
+            for question_id, quality in reviews:
+                records[question_id] = review(records.get(question_id), quality, day)
+            state.state = pack_state(records)
+            state.save(update_fields=['state', 'updated_at'])
+
+        return Response({
+            "reviewed": len(reviews),
+            # When each question comes back, e.g. {"12": "2025-02-01"}
+            "next_due": {
+                str(question_id): date.fromordinal(records[question_id][0]).isoformat()
+                for question_id, _ in reviews
+            },
+        })
+
+
+
+def gzip_json_response(request, body):
+    # Packs are stored already gzip'd. Almost every client can take them as they are;
+    # the rare one that can't gets them unzipped here.
+    if 'gzip' in request.headers.get('Accept-Encoding', ''):
+        response = HttpResponse(body, content_type='application/json')
+        response['Content-Encoding'] = 'gzip'
+    else:
+        response = HttpResponse(gzip.decompress(body), content_type='application/json')
+    patch_vary_headers(response, ['Accept-Encoding'])
+    return response
+
+
+class QuestionPackView(APIView):
+    # Sends a whole course's question bank as a small compressed pack for offline use.
+    def get(self, request, course_code):
+        course = get_object_or_404(
+            Course.objects.only('id', 'code', 'question_bank_version'),
+            code=normalize_course_code(course_code),
+        )
+
+        etag = pack_etag(course)
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = gzip_json_response(request, get_question_pack(course))
+        response['ETag'] = etag
+        return response
+
+
+class QuestionPackDeltaView(APIView):
+    # Sends only what changed since the pack version the phone already has, e.g. ?since=12
+    def get(self, request, course_code):
+        course = get_object_or_404(
+            Course.objects.only('id', 'code', 'question_bank_version'),
+            code=normalize_course_code(course_code),
+        )
+
+        try:
+            since = int(request.query_params.get('since', ''))
+        except ValueError:
+            return Response({"detail": "since must be a pack version number."}, status=status.HTTP_400_BAD_REQUEST)
+        if since < 0 or since > course.question_bank_version:
+            return Response({"detail": "Unknown pack version."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return gzip_json_response(request, get_question_delta(course, since))
+
+
+
+class QuestionSearchView(APIView):
+    # e.g. /api/quiz/search/?q=osmosis&course=BIO101
+    def get(self, request):
+        text = request.query_params.get('q', '').strip()
+        if not text:
+            return Response({"detail": "q is required."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            limit = min(int(request.query_params.get('limit', 20)), 50)
+        except ValueError:
+            return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        course_id = None
+        course_code = request.query_params.get('course')
+        if course_code:
+            course_id = get_course_id(course_code)
+
+        questions = search_questions(text, course_id=course_id, limit=max(limit, 1))
+        serializer = QuestionSearchResultSerializer(questions, many=True)
+        return Response({"results": serializer.data})
+
+
+
 class JobPostListView(APIView):
     def get(self, request):
         jobs = JobPost.objects.all()
@@ -83,12 +316,9 @@ class SubmitQuizResultView(APIView):
         # We expect 'course_code' (e.g., "GST101") and 'score' (e.g., 8)
         course_code = request.data.get('course_code')
         score = request.data.get('score')
-        print(f"DEBUG: Received submission - User: {request.user.username}, Course: {course_code}, Score: {score}")
-
 
         # 2. Basic checks: Make sure we got the needed data
         if not course_code or score is None:
-            print("DEBUG: Missing course_code or score")
             return Response(
                 {"detail": "Course code and score are required."},
                 status=status.HTTP_400_BAD_REQUEST # Send a "bad request" error
@@ -98,82 +328,354 @@ class SubmitQuizResultView(APIView):
         try:
             score = int(score)
         except ValueError:
-            print(f"DEBUG: Invalid score type received: {type(score)} for score: {score}")
             return Response(
                 {"detail": "Score must be an integer."},
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # 4. Find the Course in our database
-        course = get_object_or_404(Course, code=course_code.upper())
-
-        # 5. Get the user who is logged in (Django knows this from the 'IsAuthenticated' check)
-        user = request.user
-        print(f"DEBUG: Looking for QuizScore for user {user.username} and course {course.code}")
-
-
-        # 6. Find or Create the QuizScore for this user and course
-        #    get_or_create tries to find an existing record.
-        #    If it finds one, it gives it to us.
-        #    If it doesn't, it creates a new one using the default values.
-        quiz_score, created = QuizScore.objects.get_or_create(
-            user=user,
-            course=course,
-            defaults={'highest_score': score} # If new, set highest_score to the current score
-        )
-        print(f"DEBUG: QuizScore instance found/created. Created: {created}. Current highest_score in DB (before potential update): {quiz_score.highest_score}")
-
-        # 7. If a record already existed (wasn't created new)
-        if not created:
-            # Compare the new score with the existing highest score
-            print(f"DEBUG: Record existed. Comparing new score ({score}) with old highest ({quiz_score.highest_score})")
-            if score > quiz_score.highest_score:
-                # If the new score is higher, update it!
-                quiz_score.highest_score = score
-                quiz_score.save() # Save the change to the database
-                print(f"DEBUG: Score updated for {user.username} to new highest: {quiz_score.highest_score}")
+        # 4. How long the quiz took is optional (in seconds)
+        duration = request.data.get('duration')
+        if duration is not None:
+            try:
+                duration = int(duration)
+            except (TypeError, ValueError):
+                duration = -1
+            if duration < 0:
                 return Response(
-                    {"detail": "Highest score updated successfully!", "highest_score": quiz_score.highest_score},
-                    status=status.HTTP_200_OK # Send an "OK" message
-                )
-            else:
-                # If the new score is NOT higher, just tell React
-                print(f"DEBUG: New score ({score}) NOT higher than current highest ({quiz_score.highest_score}). No update.")
-                return Response(
-                    {"detail": "Score is not higher than current highest.", "highest_score": quiz_score.highest_score},
-                    status=status.HTTP_200_OK # Still an "OK" message, just no update happened
+                    {"detail": "Duration must be a whole number of seconds."},
+                    status=status.HTTP_400_BAD_REQUEST
                 )
+
+        # 5. The answers to each question are optional too (see quiz/answer_stats.py)
+        try:
+            answers = clean_answers(request.data.get('answers'))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 6. Find the Course in our database (usually remembered, so no query is needed)
+        course_id = get_course_id(course_code)
+        if answers:
+            # Only answers to this course's questions are counted.
+            course = Course.objects.only('id', 'question_bank_version').get(pk=course_id)
+            answers = answers_in_course(answers, get_question_ids(course))
+
+        # 7. Keep the higher of this score and the user's best score so far.
+        #    This is a single database statement, so two submissions at the same moment
+        #    can't lose the higher score. The attempt is also added to the user's history
+        #    and the course leaderboard is moved (see quiz/scores.py).
+        result = submit_quiz_result(request.user, course_id, score, duration=duration, answers=answers)
+
+        # 8. Tell React what happened
+        if result.created:
+            detail, response_status = "New quiz score saved successfully!", status.HTTP_201_CREATED # Send a "created" message
+        elif result.changed:
+            detail, response_status = "Highest score updated successfully!", status.HTTP_200_OK
         else:
-            # If a new record was created, tell React it's saved
-            print(f"DEBUG: New record created for {user.username} with score {quiz_score.highest_score} (from defaults).")
+            detail, response_status = "Score is not higher than current highest.", status.HTTP_200_OK # Still OK, just no update happened
+
+        return Response(
+            {"detail": detail, "highest_score": result.highest_score, "changed": result.changed},
+            status=response_status,
+        )
+        
+
+
+class SubmitQuizResultsBatchView(APIView):
+    # Lets the mobile app send every quiz it finished while offline in one request:
+    # [{"course_code": "GST101", "score": 8, "taken_at": "2025-01-31T09:15:00Z"}, ...]
+    # (or the same list as {"results": [...]}). "taken_at", "duration" and "answers" are optional;
+    # taken_at may be at most QUIZ_MAX_OFFLINE_DAYS days ago.
+    # Every item gets its own result back, in the same order, and one bad item doesn't stop the others.
+    permission_classes = [IsAuthenticated]
+    max_items = 100
+
+    def post(self, request):
+        # 1. Get the list sent from the app
+        items = request.data.get('results') if isinstance(request.data, dict) else request.data
+        if not isinstance(items, list) or not items:
+            return Response({"detail": "Send a list of quiz results."}, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > self.max_items:
             return Response(
-                {"detail": "New quiz score saved successfully!", "highest_score": quiz_score.highest_score},
-                status=status.HTTP_201_CREATED # Send a "created" message
+                {"detail": f"Send at most {self.max_items} quiz results at a time."},
+                status=status.HTTP_400_BAD_REQUEST
             )
-        
+
+        # 2. Check every item on its own
+        now = timezone.now()
+        results = [None] * len(items)
+        good_items = []
+        for index, item in enumerate(items):
+            try:
+                good_items.append((index, *self.clean_item(item, now)))
+            except ValueError as e:
+                results[index] = {"status": "error", "detail": str(e)}
+
+        # 3. Find all the courses in one query
+        courses = {
+            course.code: course
+            for course in Course.objects.filter(code__in={item[1] for item in good_items}).only('id', 'code', 'question_bank_version')
+        }
+
+        # 4. Save everything in one transaction, oldest quiz first, so each best score
+        #    ends up with the time it was really reached.
+        with transaction.atomic():
+            for index, code, score, taken_at, duration, answers in sorted(good_items, key=lambda item: item[3]):
+                if code not in courses:
+                    results[index] = {"course_code": code, "status": "error", "detail": "Course not found."}
+                    continue
+                if answers:
+                    # Only answers to this course's questions are counted.
+                    answers = answers_in_course(answers, get_question_ids(courses[code]))
+                result = submit_quiz_result(
+                    request.user, courses[code].pk, score, taken_at=taken_at, duration=duration, answers=answers,
+                )
+                results[index] = {
+                    "course_code": code,
+                    "status": "created" if result.created else "updated" if result.changed else "unchanged",
+                    "highest_score": result.highest_score,
+                }
+
+        # 5. Tell the app what happened to each one
+        return Response({"results": results}, status=status.HTTP_200_OK)
+
+    def clean_item(self, item, now):
+        # Returns (course_code, score, taken_at, duration, answers), or raises ValueError saying what is wrong.
+        if not isinstance(item, dict) or not item.get('course_code') or item.get('score') is None:
+            raise ValueError("Course code and score are required.")
+        code = normalize_course_code(str(item['course_code']))
+
+        try:
+            score = int(item['score'])
+        except (TypeError, ValueError):
+            raise ValueError("Score must be an integer.")
+
+        taken_at = now
+        if item.get('taken_at'):
+            taken_at = parse_datetime(str(item['taken_at']))
+            if taken_at is None:
+                raise ValueError("taken_at must be a date and time like 2025-01-31T09:15:00Z.")
+            if timezone.is_naive(taken_at):
+                taken_at = timezone.make_aware(taken_at)
+            taken_at = min(taken_at, now) # A phone with a wrong clock can't post scores from the future
+            # ...nor far into the past, where an early time would win ties or land in an old weekly board.
+            max_days = getattr(settings, 'QUIZ_MAX_OFFLINE_DAYS', 3)
+            if taken_at < now - timedelta(days=max_days):
+                raise ValueError(f"taken_at can't be more than {max_days} days ago.")
+
+        duration = item.get('duration')
+        if duration is not None:
+            try:
+                duration = int(duration)
+            except (TypeError, ValueError):
+                duration = -1
+            if duration < 0:
+                raise ValueError("Duration must be a whole number of seconds.")
+
+        return code, score, taken_at, duration, clean_answers(item.get('answers'))
+
+
+
+class QuestionStatsView(APIView):
+    # For admins: how hard each question in a course is and how well it separates strong
+    # students from weak ones, worst first, so broken questions are easy to find.
+    # Optional: ?min_answers=20 to hide questions that haven't been answered enough yet.
+    permission_classes = [IsAdminUser]
+    def get(self, request, course_code):
+        course_id = get_course_id(course_code)
+
+        try:
+            min_answers = max(int(request.query_params.get('min_answers', 1)), 1)
+        except ValueError:
+            return Response({"detail": "min_answers must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            "course_code": normalize_course_code(course_code),
+            "questions": question_statistics(course_id, min_answers=min_answers),
+        })
+
+
+
+class QuizAttemptListView(generics.ListAPIView):
+    # The logged-in user's own quiz history, newest first, for progress charts.
+    # Optional filters: ?course=GST101&since=2025-01-01T00:00:00Z&until=2025-02-01T00:00:00Z
+    permission_classes = [IsAuthenticated]
+    serializer_class = QuizAttemptSerializer
+    pagination_class = AttemptPagination
+
+    def get_queryset(self):
+        attempts = QuizAttempt.objects.filter(user=self.request.user).select_related('course')
+
+        course_code = self.request.query_params.get('course')
+        if course_code:
+            attempts = attempts.filter(course_id=get_course_id(course_code))
+
+        for param, lookup in (('since', 'taken_at__gte'), ('until', 'taken_at__lt')):
+            value = self.request.query_params.get(param)
+            if value:
+                try:
+                    when = parse_datetime(value)
+                except ValueError: # well formed but impossible, e.g. month 13
+                    when = None
+                if when is None:
+                    raise ValidationError({param: "Must be a date and time like 2025-01-31T00:00:00Z."})
+                attempts = attempts.filter(**{lookup: when})
+
+        return attempts.order_by('-taken_at')
+
 
 
 class LeaderboardView(APIView):
     permission_classes = [IsAuthenticated]    # We need to get the course_code from the URL, just like CourseQuestionsView
     def get(self, request, course_code):
-        # 1. Find the Course in our database
-        course = get_object_or_404(Course, code=course_code.upper())
+        # 1. Find the Course in our database (usually remembered, so no query is needed)
+        course_id = get_course_id(course_code)
+
+        # All-time by default; ?period=week or ?period=month shows only this week's or month's best scores.
+        period = request.query_params.get('period')
+        if period is None:
+            leaderboard = get_leaderboard_backend()
+        elif period in PeriodScore.PERIODS:
+            leaderboard = PeriodLeaderboardBackend(period)
+        else:
+            return Response(
+                {"detail": f"period must be one of: {', '.join(PeriodScore.PERIODS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
 
-        # 2. Get all QuizScore entries for this specific course
-        #    Since we used 'unique_together' and 'highest_score' in our model,
-        #    each entry here is already the highest score for a user in this course.
-        #    We also sort them from highest score down.
-        leaderboard_scores = QuizScore.objects.filter(course=course).order_by('-highest_score')
+        # 2. Get one page of the course's leaderboard. Each user is on it once, with their
+        #    highest score, sorted from highest score down, earliest first on ties.
+        #    The default backend keeps it in memory, so this doesn't touch the database.
+        paginator = LeaderboardPagination()
+        page = paginator.paginate_queryset(RankedEntries(leaderboard, course_id), request, view=self)
 
-        # 3. Package the scores using our QuizScoreSerializer
-        #    'many=True' because we are sending a list of scores, not just one.
-        serializer = QuizScoreSerializer(leaderboard_scores, many=True)
+        # 3. Package the entries using our LeaderboardEntrySerializer
+        context = {'course_code': normalize_course_code(course_code)}
+        serializer = LeaderboardEntrySerializer(page, many=True, context=context)
+        response = paginator.get_paginated_response(serializer.data)
 
-        # 4. Send the packaged data to React
-        return Response(serializer.data)
-    
+        # 4. Add the logged-in user's own rank, even if they are not on this page,
+        #    and the people just above and below them
+        around_me = leaderboard.around(course_id, request.user.pk, radius=2)
+        me = next((entry for entry in around_me if entry.user_id == request.user.pk), None)
+        response.data['me'] = LeaderboardEntrySerializer(me, context=context).data if me else None
+        response.data['around_me'] = LeaderboardEntrySerializer(around_me, many=True, context=context).data
+        if period is not None:
+            response.data['period'] = period
+            response.data['period_start'] = leaderboard.period_start.isoformat()
 
+        # 5. Send the packaged data to React
+        return response
 
 
 
+class PercentileView(APIView):
+    # "You beat X% of students": /api/quiz/percentile/GST101/?score=8
+    def get(self, request, course_code):
+        course_id = get_course_id(course_code)
+        try:
+            score = int(request.query_params['score'])
+        except (KeyError, ValueError):
+            return Response({"detail": "score must be given as a whole number."}, status=status.HTTP_400_BAD_REQUEST)
+
+        scorers, below, equal = score_percentile(course_id, score)
+        return Response({
+            "course_code": normalize_course_code(course_code),
+            "score": score,
+            "scorers": scorers,
+            # beat: the share of students with a lower best score.
+            # percentile: the usual percentile rank, where ties count as half below.
+            "beat": round(100 * below / scorers, 1) if scorers else None,
+            "percentile": round(100 * (below + equal / 2) / scorers, 1) if scorers else None,
+        })
+
+
+
+# How long browsers wait before asking again when the live leaderboard can't stream (see below).
+WSGI_RETRY_SECONDS = 30
+
+
+async def leaderboard_stream(request, course_code):
+    # A live course leaderboard as a Server-Sent Events stream (see quiz/live.py):
+    #   const events = new EventSource('/api/quiz/leaderboard/GST101/live/?token=...')
+    #   events.addEventListener('leaderboard', e => showTopScores(JSON.parse(e.data)))
+    # The browser sends the session cookie by itself. EventSource can't send an Authorization
+    # header, so apps using token login pass the token in ?token= instead.
+    # This is a plain async Django view (not DRF), so it doesn't hold a worker thread while it waits.
+
+    # 1. Only logged-in users can watch, just like LeaderboardView
+    user = await request.auser()
+    token = request.GET.get('token') or request.headers.get('Authorization', '').removeprefix('Token ').strip()
+    if not user.is_authenticated and token:
+        found = await Token.objects.select_related('user').filter(key=token).afirst()
+        user = found.user if found else user
+    if not user.is_authenticated:
+        return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+    # 2. Find the course (a 404 if it doesn't exist)
+    course_id = await sync_to_async(get_course_id)(course_code)
+    channel = leaderboard_channel(course_id)
+
+    # 3. Under WSGI (manage.py runserver, gunicorn without an ASGI worker) a never-ending stream
+    #    would keep a whole worker busy. There we send the leaderboard once and let the browser's
+    #    EventSource come back for a new one after `retry` milliseconds: plain polling.
+    if not isinstance(request, ASGIRequest):
+        snapshot = await sync_to_async(leaderboard_snapshot)(course_id)
+        response = HttpResponse(
+            f"retry: {WSGI_RETRY_SECONDS * 1000}\nevent: leaderboard\ndata: {snapshot}\n\n",
+            content_type='text/event-stream',
+        )
+        response['Cache-Control'] = 'no-cache'
+        return response
+
+    async def events():
+        # Start listening first, then send the leaderboard as it is now, so no change
+        # in between is missed. After that, send every change as it comes.
+        # A comment line every 15 seconds stops proxies from closing a quiet connection.
+        subscription = get_broadcast_hub().subscribe(channel, timeout=15)
+        try:
+            yield f"event: leaderboard\ndata: {await sync_to_async(leaderboard_snapshot)(course_id)}\n\n"
+            async for message in subscription:
+                yield f"event: leaderboard\ndata: {message}\n\n" if message is not None else ": keep-alive\n\n"
+        finally:
+            subscription.close()
+
+    response = StreamingHttpResponse(events(), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no' # Tell nginx not to hold the events back
+    return response
+
+
+
+class OverallLeaderboardView(APIView):
+    # Ranks users by their best scores across all courses: ?by=total (the default) or ?by=average
+    permission_classes = [IsAuthenticated]
+    def get(self, request):
+        # 1. Which ranking did React ask for?
+        by = request.query_params.get('by', 'total')
+        if by not in OVERALL_RANKINGS:
+            return Response(
+                {"detail": f"by must be one of: {', '.join(OVERALL_RANKINGS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # 2. Read one page of the summaries, already sorted by the database index
+        paginator = LeaderboardPagination()
+        page = paginator.paginate_queryset(ranked_summaries(by), request, view=self)
+
+        # 3. Everyone on this page gets their rank from their position in the list
+        first_rank = paginator.page.start_index()
+        for offset, summary in enumerate(page):
+            summary.rank = first_rank + offset
+
+        serializer = OverallLeaderboardEntrySerializer(page, many=True)
+        response = paginator.get_paginated_response(serializer.data)
+
+        # 4. Add the logged-in user's own rank, even if they are not on this page
+        my_summary = UserScoreSummary.objects.select_related('user').filter(user=request.user).first()
+        if my_summary is not None:
+            my_summary.rank = summary_rank_of(my_summary, by)
+            response.data['me'] = OverallLeaderboardEntrySerializer(my_summary).data
+        else:
+            response.data['me'] = None
 
+        return response